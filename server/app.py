@@ -1,20 +1,16 @@
+import os
 from flask import Flask, make_response, jsonify
-from flask_migrate import Migrate
 from flask_restful import Api, Resource
 from models import db, Country, HsCode, Product
-from resources import ExportResource, LoginResource, LogoutResource, CountriesResource, CountryResource, HsCodesResource, ProductsResource, ExportTablesResource,  ImportTablesResource, TaxTablesResource
-
-app = Flask(__name__)
-
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///app.db'
-app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-
-app.json.compact = False
-
-migrate = Migrate(app, db)
-
-db.init_app(app)
-api = Api(app)
+from commands import import_exports_command, reports_command, rollups_command, snapshots_command
+from cache import reference_cache
+from metrics import request_metrics
+from compression import compression
+from conditional import conditional_get
+from replica import read_replica
+from config import Config, init_engine_events
+from encoding import FastJSONProvider, output_json
+from resources import login_manager, ExportResource, ExportAggregateResource, ExportTimeseriesResource, LoginResource, LogoutResource, CountriesResource, CountryResource, HsCodesResource, ProductsResource, ExportTablesResource,  ImportTablesResource, ImportBatchResource, ImportJobResource, TaxTablesResource, TaxQuoteResource, SearchResource, SnapshotsResource, SnapshotFileResource
 
 # @app.route('/')
 # def index():
@@ -29,21 +25,66 @@ class Index(Resource):
         }, 200)
         return resp
 
-# EndPoints
-api.add_resource(Index, '/', endpoint='home')
-api.add_resource(ExportResource, '/exports', '/exports/<int:export_id>')  # Add this line
+class Metrics(Resource):
+    def get(self):
+        resp = make_response(request_metrics.render(), 200)
+        resp.mimetype = 'text/plain; version=0.0.4'
+        return resp
+
+
+def create_app(config=Config):
+    app = Flask(__name__)
+
+    app.config.from_object(config)
+
+    # Compact JSON, indented in debug mode
+    app.json = FastJSONProvider(app)
+
+    # Only the flask CLI needs `flask db`; importing alembic would add ~0.4s to every worker boot
+    if os.environ.get('FLASK_RUN_FROM_CLI') == 'true':
+        from flask_migrate import Migrate
+        Migrate(app, db)
+    app.cli.add_command(import_exports_command)
+    app.cli.add_command(rollups_command)
+    app.cli.add_command(snapshots_command)
+    app.cli.add_command(reports_command)
+
+    read_replica.init_app(app, db)
+    db.init_app(app)
+    init_engine_events(app, db)
+    reference_cache.init_app(app)
+    request_metrics.init_app(app, db)
+    compression.init_app(app)
+    conditional_get.init_app(app)
+    login_manager.init_app(app)
+    api = Api(app)
+    api.representations['application/json'] = output_json
+
+    # EndPoints
+    api.add_resource(Index, '/', endpoint='home')
+    api.add_resource(Metrics, '/metrics')
+    api.add_resource(ExportResource, '/exports', '/exports/<int:export_id>')  # Add this line
+    api.add_resource(ExportAggregateResource, '/exports/aggregate')
+    api.add_resource(ExportTimeseriesResource, '/exports/timeseries')
 
-api.add_resource(LoginResource, '/login')
-api.add_resource(LogoutResource, '/logout')
-api.add_resource(CountriesResource, '/countries')
-api.add_resource(CountryResource, '/countries/<int:id>')
-api.add_resource(HsCodesResource, '/hscodes')
-api.add_resource(ProductsResource, '/products')
-api.add_resource(ExportTablesResource, '/exporttables')
-api.add_resource(ImportTablesResource, '/importtables')
-api.add_resource(TaxTablesResource, '/taxtables')
+    api.add_resource(LoginResource, '/login')
+    api.add_resource(LogoutResource, '/logout')
+    api.add_resource(CountriesResource, '/countries')
+    api.add_resource(CountryResource, '/countries/<int:id>')
+    api.add_resource(HsCodesResource, '/hscodes')
+    api.add_resource(ProductsResource, '/products')
+    api.add_resource(ExportTablesResource, '/exporttables')
+    api.add_resource(ImportTablesResource, '/importtables')
+    api.add_resource(ImportBatchResource, '/importtables/batch')
+    api.add_resource(ImportJobResource, '/importtables/batch/<string:job_id>')
+    api.add_resource(TaxTablesResource, '/taxtables')
+    api.add_resource(TaxQuoteResource, '/taxes/quote')
+    api.add_resource(SearchResource, '/search')
+    api.add_resource(SnapshotsResource, '/snapshots')
+    api.add_resource(SnapshotFileResource, '/snapshots/<string:table>/<int:year>/<int:month>')
 
+    return app
 
 
 if __name__ == '__main__':
-    app.run(port=5555, debug=True)
+    create_app().run(port=5555, debug=True)
@@ -0,0 +1,118 @@
+"""Lock contention between concurrent SQLite writers and readers.
+
+Starts several writer processes (small insert transactions, like
+CountriesResource.post) next to reader processes running table scans,
+first with SQLite's defaults and then with the pragmas from config.py.
+
+    cd server && python -m benchmarks.concurrent_writers --writers 8 --readers 2
+"""
+import argparse
+import multiprocessing
+import os
+import shutil
+import tempfile
+import time
+from sqlalchemy import create_engine, event, insert, select, func
+from sqlalchemy.exc import OperationalError
+from config import pragma_listener, sqlite_pragmas
+from models import db, Country, ExportTable
+
+# Rollback journal, synchronous=FULL and pysqlite's default 5s timeout
+DEFAULT_SETTINGS = {'busy_timeout': 5000}
+
+
+def make_engine(path, pragmas):
+    engine = create_engine(f'sqlite:///{path}', connect_args={'timeout': pragmas['busy_timeout'] / 1000})
+    event.listen(engine, 'connect', pragma_listener(pragmas))
+    return engine
+
+
+def writer(path, pragmas, worker, writes, results):
+    engine = make_engine(path, pragmas)
+    latencies, locked = [], 0
+    for i in range(writes):
+        started = time.perf_counter()
+        try:
+            with engine.begin() as conn:
+                conn.execute(insert(Country.__table__), {'name': f'Writer {worker}', 'code': f'W{worker}-{i}'})
+        except OperationalError as error:
+            if 'locked' not in str(error):
+                raise
+            locked += 1
+            continue
+        latencies.append(time.perf_counter() - started)
+    results.put(('writer', latencies, locked))
+
+
+def reader(path, pragmas, stop, results):
+    engine = make_engine(path, pragmas)
+    scans, locked = 0, 0
+    while not stop.is_set():
+        try:
+            with engine.connect() as conn:
+                conn.execute(select(func.sum(ExportTable.fob_value), func.count()).select_from(ExportTable)).one()
+            scans += 1
+        except OperationalError:
+            locked += 1
+    results.put(('reader', scans, locked))
+
+
+def run(path, pragmas, writers, readers, writes):
+    results, stop = multiprocessing.Queue(), multiprocessing.Event()
+    reader_procs = [multiprocessing.Process(target=reader, args=(path, pragmas, stop, results)) for _ in range(readers)]
+    writer_procs = [multiprocessing.Process(target=writer, args=(path, pragmas, n, writes, results)) for n in range(writers)]
+
+    started = time.perf_counter()
+    for proc in reader_procs + writer_procs:
+        proc.start()
+    collected = [results.get() for _ in writer_procs]
+    elapsed = time.perf_counter() - started
+    stop.set()
+    collected += [results.get() for _ in reader_procs]
+    for proc in reader_procs + writer_procs:
+        proc.join()
+
+    latencies = sorted(l for kind, values, _ in collected if kind == 'writer' for l in values)
+    return {
+        'seconds': elapsed,
+        'commits': len(latencies),
+        'writes_per_second': len(latencies) / elapsed,
+        'write_p50_ms': latencies[len(latencies) // 2] * 1000 if latencies else None,
+        'write_p99_ms': latencies[int(len(latencies) * 0.99)] * 1000 if latencies else None,
+        'writer_locked_errors': sum(locked for kind, _, locked in collected if kind == 'writer'),
+        'reader_scans_per_second': sum(scans for kind, scans, _ in collected if kind == 'reader') / elapsed,
+        'reader_locked_errors': sum(locked for kind, _, locked in collected if kind == 'reader'),
+    }
+
+
+def prepare(path, rows):
+    engine = create_engine(f'sqlite:///{path}')
+    db.metadata.create_all(engine, tables=[Country.__table__, ExportTable.__table__])
+    with engine.begin() as conn:
+        conn.execute(insert(ExportTable.__table__), [{'fob_value': i, 'quantity': i, 'unit': 'kg'} for i in range(rows)])
+    engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--writers', type=int, default=8)
+    parser.add_argument('--readers', type=int, default=2)
+    parser.add_argument('--writes', type=int, default=200, help='insert transactions per writer')
+    parser.add_argument('--rows', type=int, default=200000, help='rows in the table the readers scan')
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='kam-bench-')
+    try:
+        for label, pragmas in (('sqlite defaults', DEFAULT_SETTINGS), ('config.py pragmas', sqlite_pragmas())):
+            path = os.path.join(workdir, f"{label.split()[0]}.db")
+            prepare(path, args.rows)
+            report = run(path, pragmas, args.writers, args.readers, args.writes)
+            print(f'== {label}: {pragmas}')
+            for key, value in report.items():
+                print(f'   {key:22} {value:.2f}' if isinstance(value, float) else f'   {key:22} {value}')
+    finally:
+        shutil.rmtree(workdir)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,118 @@
+"""Deterministic synthetic trade data for benchmarks and load tests.
+
+Seeds HS codes and pycountry countries the way seed.py does. It then adds
+a few faker-named products per HS code, tax rates, and --rows export and
+import rows, all written to the database the app is configured for. The
+same --seed always produces the same rows. This replaces the private
+kamexports.xls that seed.py reads.
+
+    cd server && DATABASE_URL=sqlite:////tmp/kam-bench.db python -m benchmarks.generate --rows 1000000
+"""
+import argparse
+import time
+from datetime import datetime, timedelta
+import numpy as np
+from faker import Faker
+from sqlalchemy import insert, select
+from app import create_app
+from models import db, Country, HsCode, Product, ExportTable, ImportTable, ImportMonthlyRollup, TaxTable
+from rollups import refresh_export_rollup, refresh_import_rollup
+from cache import reference_cache
+from seed import seed_reference_data
+
+START = datetime(2020, 1, 1)
+END = datetime(2025, 1, 1)
+BATCH_SIZE = 50000
+UNITS = ['KG', 'MT', 'PCS']
+ENTRY_STATUSES = ['CLEARED', 'HELD', 'PENDING']
+PRODUCTS_PER_HSCODE = 3
+
+
+def generate_reference_data(seed):
+    db.create_all()
+    ImportTable.query.delete()
+    ImportMonthlyRollup.query.delete()
+    TaxTable.query.delete()
+    seed_reference_data()
+
+    fake = Faker()
+    fake.seed_instance(seed)
+    rng = np.random.default_rng(seed)
+    hscodes = db.session.execute(select(HsCode.id, HsCode.description).order_by(HsCode.id)).all()
+
+    db.session.execute(insert(Product), [
+        {'name': f'{description} - {fake.word()} {fake.word()}', 'hs_code_id': hscode_id}
+        for hscode_id, description in hscodes for _ in range(PRODUCTS_PER_HSCODE)
+    ])
+    rates = rng.integers(0, 36, size=(len(hscodes) + 1, 4)).tolist()
+    db.session.execute(insert(TaxTable), [
+        {'hscode_id': hscode_id, 'import_duty': duty, 'excise_duty': excise, 'export_duty': export_duty, 'export_rate': 0,
+         'import_declaration_fee': 2, 'railway_development_levy': 2}
+        for hscode_id, (duty, excise, export_duty, _) in zip([None] + [hscode_id for hscode_id, _ in hscodes], rates)
+    ])
+    db.session.commit()
+    reference_cache.invalidate('products', 'taxtables')
+
+
+def _dates(rows):
+    # Evenly spaced, distinct timestamps: no two rows can share a natural key
+    step = (END - START).total_seconds() / max(rows, 1)
+    return [START + timedelta(seconds=int(index * step)) for index in range(rows)]
+
+
+def generate_facts(rows, seed):
+    fake = Faker()
+    fake.seed_instance(seed)
+    rng = np.random.default_rng(seed)
+    country_ids = np.array(db.session.execute(select(Country.id).order_by(Country.id)).scalars().all())
+    kenya_id = db.session.execute(select(Country.id).where(Country.code == 'KE')).scalar()
+    products = db.session.execute(select(Product.id, Product.hs_code_id).order_by(Product.id)).all()
+    product_ids = np.array([product_id for product_id, _ in products])
+    product_hscodes = np.array([hscode_id for _, hscode_id in products])
+    ports = [fake.city().upper() for _ in range(8)]
+
+    for table, date_column in ((ExportTable.__table__, 'export_date'), (ImportTable.__table__, 'reg_date')):
+        dates = _dates(rows)
+        for start in range(0, rows, BATCH_SIZE):
+            size = min(BATCH_SIZE, rows - start)
+            products_drawn = rng.integers(0, len(product_ids), size)
+            columns = {
+                date_column: dates[start:start + size],
+                'product_id': product_ids[products_drawn].tolist(),
+                'hscode_id': product_hscodes[products_drawn].tolist(),
+                'quantity': rng.integers(1, 100000, size).tolist(),
+            }
+            if table is ExportTable.__table__:
+                columns['destination_id'] = rng.choice(country_ids, size).tolist()
+                columns['fob_value'] = np.round(rng.lognormal(13, 1.5, size), 2).tolist()
+                columns['unit'] = [UNITS[index] for index in rng.integers(0, len(UNITS), size)]
+            else:
+                columns['origin_id'] = rng.choice(country_ids, size).tolist()
+                columns['destination_id'] = [kenya_id] * size
+                columns['entry_number'] = list(range(start + 1, start + size + 1))
+                columns['entry_status'] = [ENTRY_STATUSES[index] for index in rng.choice(3, size, p=[0.8, 0.15, 0.05])]
+                columns['discharge_port'] = [ports[index] for index in rng.integers(0, len(ports), size)]
+            names = list(columns)
+            db.session.execute(insert(table), [dict(zip(names, values)) for values in zip(*columns.values())])
+            db.session.commit()
+
+    refresh_export_rollup()
+    refresh_import_rollup()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=1000000, help='rows per fact table')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    with create_app().app_context():
+        started = time.perf_counter()
+        generate_reference_data(args.seed)
+        generate_facts(args.rows, args.seed)
+        print(f'Generated {args.rows} export and import rows in {time.perf_counter() - started:.1f}s '
+              f'into {db.engine.url.render_as_string(hide_password=True)}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,143 @@
+"""EXPLAIN QUERY PLAN and timings for the trade fact indexes.
+
+Builds a synthetic exporttables/importtables pair in a throwaway SQLite
+file, runs the dashboard query shapes without the indexes declared in
+models.py, then creates them and runs the same queries again.
+
+    cd server && python -m benchmarks.indexes --rows 1000000
+"""
+import argparse
+import os
+import random
+import shutil
+import tempfile
+import time
+from datetime import datetime
+from sqlalchemy import create_engine, insert, text
+from models import db, Country, HsCode, Product, ExportTable, ImportTable
+
+QUERIES = {
+    'exports by destination and date range': '''
+        SELECT strftime('%Y', export_date) AS year, sum(fob_value), count(*)
+        FROM exporttables
+        WHERE destination_id = 110 AND export_date >= '2022-01-01' AND export_date < '2023-01-01'
+        GROUP BY year
+    ''',
+    'exports by hs code and date range': '''
+        SELECT destination_id, sum(fob_value), sum(quantity)
+        FROM exporttables
+        WHERE hscode_id = 7 AND export_date >= '2023-06-01' AND export_date < '2023-07-01'
+        GROUP BY destination_id
+    ''',
+    'exports for one month': '''
+        SELECT hscode_id, sum(fob_value) FROM exporttables
+        WHERE export_date >= '2024-03-01' AND export_date < '2024-04-01'
+        GROUP BY hscode_id
+    ''',
+    'exports joined to products': '''
+        SELECT p.name, sum(e.fob_value) FROM products p
+        JOIN exporttables e ON e.product_id = p.id
+        WHERE p.id = 3
+        GROUP BY p.name
+    ''',
+    'imports by origin and date range': '''
+        SELECT count(*), sum(quantity) FROM importtables
+        WHERE origin_id = 42 AND reg_date >= '2023-01-01' AND reg_date < '2023-04-01'
+    ''',
+}
+
+TABLES = [Country.__table__, HsCode.__table__, Product.__table__, ExportTable.__table__, ImportTable.__table__]
+FACT_TABLES = [ExportTable.__table__, ImportTable.__table__]
+BATCH_SIZE = 50000
+
+
+def populate(engine, rows, seed):
+    rng = random.Random(seed)
+    months = [datetime(year, month, 1) for year in range(2020, 2025) for month in range(1, 13)]
+
+    with engine.begin() as conn:
+        conn.execute(insert(Country.__table__), [{'id': i, 'name': f'Country {i}', 'code': f'C{i:03d}'} for i in range(1, 250)])
+        conn.execute(insert(HsCode.__table__), [{'id': i, 'code': f'{4800 + i}.00.00', 'description': f'HS {i}'} for i in range(1, 20)])
+        conn.execute(insert(Product.__table__), [{'id': i, 'name': f'Product {i}', 'hs_code_id': i} for i in range(1, 20)])
+
+    for table, date_column in ((ExportTable.__table__, 'export_date'), (ImportTable.__table__, 'reg_date')):
+        for start in range(0, rows, BATCH_SIZE):
+            batch = []
+            for _ in range(min(BATCH_SIZE, rows - start)):
+                hscode_id = rng.randint(1, 19)
+                row = {
+                    date_column: rng.choice(months),
+                    'destination_id': rng.randint(1, 249),
+                    'hscode_id': hscode_id,
+                    'product_id': hscode_id,
+                    'quantity': rng.randint(1, 100000),
+                }
+                if table is ExportTable.__table__:
+                    row.update(fob_value=rng.randint(100, 10000000), unit='kg')
+                else:
+                    row.update(origin_id=rng.randint(1, 249), entry_status='CLEARED', discharge_port='MOMBASA')
+                batch.append(row)
+            with engine.begin() as conn:
+                conn.execute(insert(table), batch)
+
+
+def run_queries(engine, repeat):
+    results = {}
+    with engine.connect() as conn:
+        for name, sql in QUERIES.items():
+            plan = [row[-1] for row in conn.execute(text('EXPLAIN QUERY PLAN ' + sql))]
+            started = time.perf_counter()
+            for _ in range(repeat):
+                conn.execute(text(sql)).fetchall()
+            results[name] = (plan, (time.perf_counter() - started) / repeat)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=1000000, help='rows per fact table')
+    parser.add_argument('--repeat', type=int, default=5, help='runs per query when timing')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--keep', action='store_true', help='keep the generated database')
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='kam-bench-')
+    engine = create_engine(f"sqlite:///{os.path.join(workdir, 'bench.db')}")
+    db.metadata.create_all(engine, tables=TABLES)
+    for table in FACT_TABLES:
+        for index in table.indexes:
+            index.drop(engine)
+
+    started = time.perf_counter()
+    populate(engine, args.rows, args.seed)
+    print(f'Generated {args.rows} rows per fact table in {time.perf_counter() - started:.1f}s')
+
+    before = run_queries(engine, args.repeat)
+
+    started = time.perf_counter()
+    for table in FACT_TABLES:
+        for index in table.indexes:
+            index.create(engine)
+    with engine.connect() as conn:
+        conn.execute(text('ANALYZE'))
+    print(f'Created indexes in {time.perf_counter() - started:.1f}s')
+
+    after = run_queries(engine, args.repeat)
+
+    for name in QUERIES:
+        plan_before, seconds_before = before[name]
+        plan_after, seconds_after = after[name]
+        print(f'\n== {name}')
+        print(f'   before: {seconds_before * 1000:9.2f} ms  ' + ' | '.join(plan_before))
+        print(f'   after:  {seconds_after * 1000:9.2f} ms  ' + ' | '.join(plan_after))
+        print(f'   speedup: {seconds_before / seconds_after:.1f}x')
+
+    engine.dispose()
+    if args.keep:
+        print(f'\nDatabase kept in {workdir}')
+    else:
+        shutil.rmtree(workdir)
+
+
+if __name__ == '__main__':
+    main()
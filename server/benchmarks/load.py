@@ -0,0 +1,259 @@
+"""Load driver over every route in app.py, with a JSON report for comparisons.
+
+Runs each scenario --requests times through the Flask test client against
+the configured database (normally one filled by benchmarks.generate). It
+records p50/p99/mean latency, throughput and status codes per scenario,
+plus the process's peak RSS. Pass --compare with an earlier report to
+print the differences; the exit status is 1 when a scenario's p50 or p99
+got more than --threshold slower.
+
+    cd server && DATABASE_URL=sqlite:////tmp/kam-bench.db python -m benchmarks.load --output before.json
+    cd server && DATABASE_URL=sqlite:////tmp/kam-bench.db python -m benchmarks.load --compare before.json
+
+Write methods on /countries are not driven, so the data stays comparable
+between runs. The import batch scenario does write: its declarations are
+dated January 1990 and come from the last country, outside what the other
+scenarios read. A route with no scenario is listed as not covered.
+"""
+import argparse
+import json
+import platform
+import resource
+import subprocess
+import sys
+import time
+from collections import Counter
+from datetime import datetime
+import numpy as np
+from sqlalchemy import func, select
+from werkzeug.exceptions import HTTPException
+from app import create_app
+from models import db, Country, HsCode, ExportTable, ImportTable, ImportJob, User
+from jobs import create_import_job
+from snapshots import load_manifest
+
+BENCH_USER = 'bench'
+BENCH_PASSWORD = 'bench-password'
+
+
+def ensure_user():
+    user = User.query.filter_by(username=BENCH_USER).first()
+    if user is None:
+        user = User(username=BENCH_USER)
+        user.set_password(BENCH_PASSWORD)
+        db.session.add(user)
+        db.session.commit()
+
+
+def sample_values():
+    """Ids and dates that exist in the database, so scenarios hit real rows."""
+    export_id = db.session.execute(select(func.max(ExportTable.id))).scalar() or 1
+    latest = db.session.execute(select(func.max(ExportTable.export_date))).scalar() or datetime(2024, 12, 1)
+    country_id, country_code = db.session.execute(select(Country.id, Country.code).order_by(Country.id)).first() or (1, 'KE')
+    last_country_code = db.session.execute(select(Country.code).order_by(Country.id.desc())).scalar() or country_code
+    import_job_id = db.session.execute(select(ImportJob.id).order_by(ImportJob.created_at.desc())).scalar() \
+        or create_import_job([])
+    hscode_id, hscode = db.session.execute(select(HsCode.id, HsCode.code).order_by(HsCode.id)).first() or (1, '4804.11.00')
+    snapshot = next(
+        ((table, *(int(part) for part in partition.split('-'))) for table, partitions in sorted(load_manifest().items())
+         for partition in sorted(partitions)),
+        ('exports', latest.year, latest.month)
+    )
+    return {
+        'export_id': export_id // 2 or 1,
+        'year': latest.year,
+        'month': latest.month,
+        'country_id': country_id,
+        'country_code': country_code,
+        'hscode_id': hscode_id,
+        'hscode': hscode,
+        'snapshot': snapshot,
+        'last_country_code': last_country_code,
+        'import_job_id': import_job_id,
+    }
+
+
+def scenarios(sample):
+    login = {'json': {'username': BENCH_USER, 'password': BENCH_PASSWORD}}
+    month = f"{sample['year']}-{sample['month']:02d}"
+    return [
+        {'name': 'home', 'url': '/'},
+        {'name': 'login', 'method': 'POST', 'url': '/login', **login},
+        {'name': 'countries', 'url': '/countries'},
+        {'name': 'countries filtered', 'url': f"/countries?code={sample['country_code']}"},
+        {'name': 'country', 'url': f"/countries/{sample['country_id']}"},
+        {'name': 'hscodes', 'url': '/hscodes'},
+        {'name': 'products', 'url': '/products'},
+        {'name': 'search words', 'url': '/search?q=kraft+liner'},
+        {'name': 'search code', 'url': '/search?q=4804'},
+        {'name': 'exports page', 'url': '/exports?limit=500'},
+        {'name': 'exports page 5000', 'url': '/exports?limit=5000'},
+        {'name': 'export', 'url': f"/exports/{sample['export_id']}"},
+        {'name': 'aggregate by month', 'url': '/exports/aggregate?group_by=year,month&metrics=sum:fob_value,avg:quantity,count'},
+        {'name': 'aggregate by destination', 'url': f'/exports/aggregate?group_by=destination&start={month}&end={month}'},
+        {'name': 'timeseries by destination',
+         'url': f"/exports/timeseries?group_by=destination&destination={sample['country_code']}&start={sample['year'] - 1}-01&end={month}"},
+        {'name': 'exporttables filtered', 'url': f"/exporttables?hscode_id={sample['hscode_id']}&fields=id,fob_value,quantity"},
+        {'name': 'exporttables ndjson month', 'url': f"/exporttables?export_date__gte={month}-01&destination_id={sample['country_id']}",
+         'headers': {'Accept': 'application/x-ndjson'}},
+        {'name': 'importtables filtered', 'url': f"/importtables?origin_id={sample['country_id']}&fields=id,quantity,entry_status"},
+        {'name': 'import batch 100', 'method': 'POST', 'url': '/importtables/batch',
+         'json': [{'reg_date': f'1990-01-{day % 28 + 1:02d}', 'entry_number': day, 'entry_status': 'CLEARED', 'quantity': day,
+                   'origin': sample['last_country_code'], 'hscode': sample['hscode']} for day in range(100)]},
+        {'name': 'import job', 'url': f"/importtables/batch/{sample['import_job_id']}"},
+        {'name': 'taxtables', 'url': '/taxtables'},
+        {'name': 'tax quote', 'method': 'POST', 'url': '/taxes/quote',
+         'json': {'hscode': sample['hscode'], 'customs_value': 100000, 'fob_value': 50000}},
+        {'name': 'tax quote batch', 'method': 'POST', 'url': '/taxes/quote',
+         'json': {'items': [{'hscode': sample['hscode'], 'customs_value': value} for value in range(1000, 101000, 1000)]}},
+        {'name': 'snapshots', 'url': '/snapshots'},
+        {'name': 'snapshot file', 'url': '/snapshots/{}/{}/{}'.format(*sample['snapshot'])},
+        {'name': 'metrics', 'url': '/metrics'},
+        # Last: logs the client out, and logs back in (untimed) before every request
+        {'name': 'logout', 'method': 'POST', 'url': '/logout', 'before': ('POST', '/login', login)},
+    ]
+
+
+def uncovered_routes(app, scenario_list):
+    adapter = app.url_map.bind('localhost')
+    covered = set()
+    for scenario in scenario_list:
+        try:
+            covered.add(adapter.match(scenario['url'].split('?')[0], scenario.get('method', 'GET'))[0])
+        except HTTPException:
+            pass
+    return sorted(rule.rule for rule in app.url_map.iter_rules() if rule.endpoint not in covered | {'static'})
+
+
+def run_scenario(client, scenario, requests, warmup):
+    method = scenario.get('method', 'GET')
+    options = {key: scenario[key] for key in ('json', 'headers') if key in scenario}
+    timings, statuses = [], Counter()
+
+    for iteration in range(warmup + requests):
+        if 'before' in scenario:
+            before_method, before_url, before_options = scenario['before']
+            client.open(before_url, method=before_method, **before_options).close()
+        started = time.perf_counter()
+        response = client.open(scenario['url'], method=method, **options)
+        # Read the whole body so streamed responses are timed to the last byte
+        response.get_data()
+        elapsed = time.perf_counter() - started
+        response.close()
+        if iteration >= warmup:
+            timings.append(elapsed)
+            statuses[response.status_code] += 1
+
+    timings = np.array(timings) * 1000
+    return {
+        'method': method,
+        'url': scenario['url'],
+        'statuses': {str(status): count for status, count in sorted(statuses.items())},
+        'errors': sum(count for status, count in statuses.items() if status >= 400),
+        'p50_ms': round(float(np.percentile(timings, 50)), 3),
+        'p99_ms': round(float(np.percentile(timings, 99)), 3),
+        'mean_ms': round(float(timings.mean()), 3),
+        'throughput_rps': round(len(timings) / (timings.sum() / 1000), 1),
+    }
+
+
+def peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS
+    return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(report, baseline, threshold):
+    regressions = []
+    print(f"\nCompared with {baseline.get('commit') or 'baseline'} (threshold {threshold:.0%})")
+    print(f"{'scenario':32} {'p50 ms':>19} {'p99 ms':>19}")
+    for name, result in report['scenarios'].items():
+        previous = baseline['scenarios'].get(name)
+        if previous is None:
+            print(f'{name:32} {"new":>19}')
+            continue
+        changes, regressed = [], False
+        for metric in ('p50_ms', 'p99_ms'):
+            change = result[metric] / previous[metric] - 1 if previous[metric] else 0
+            changes.append(f'{result[metric]:9.2f} {change:+8.0%}')
+            if change > threshold:
+                regressions.append((name, metric, change))
+                regressed = True
+        print(f'{name:32} ' + ' '.join(changes) + (' REGRESSION' if regressed else ''))
+    print(f"peak RSS: {baseline.get('peak_rss_mb')} MB -> {report['peak_rss_mb']} MB")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=50, help='timed requests per scenario')
+    parser.add_argument('--warmup', type=int, default=3, help='untimed requests per scenario first')
+    parser.add_argument('--only', help='comma-separated scenario names')
+    parser.add_argument('--output', help='write the JSON report here')
+    parser.add_argument('--compare', help='earlier JSON report to compare against')
+    parser.add_argument('--threshold', type=float, default=0.2, help='allowed slowdown before a regression, 0.2 = 20%%')
+    args = parser.parse_args()
+
+    app = create_app()
+
+    # Sessions (and so /login) need a key; any value will do for a local run
+    if not app.config.get('SECRET_KEY'):
+        app.config['SECRET_KEY'] = 'benchmark'
+
+    with app.app_context():
+        ensure_user()
+        sample = sample_values()
+        rows = {
+            'exporttables': db.session.execute(select(func.count()).select_from(ExportTable)).scalar(),
+            'importtables': db.session.execute(select(func.count()).select_from(ImportTable)).scalar(),
+        }
+        database = db.engine.url.render_as_string(hide_password=True)
+
+    scenario_list = scenarios(sample)
+    for rule in uncovered_routes(app, scenario_list):
+        print(f'not covered: {rule}')
+    if args.only:
+        names = set(args.only.split(','))
+        scenario_list = [scenario for scenario in scenario_list if scenario['name'] in names]
+
+    client = app.test_client()
+    started = time.perf_counter()
+    results = {}
+    for scenario in scenario_list:
+        results[scenario['name']] = result = run_scenario(client, scenario, args.requests, args.warmup)
+        print(f"{scenario['name']:32} p50 {result['p50_ms']:9.2f} ms  p99 {result['p99_ms']:9.2f} ms  "
+              f"{result['throughput_rps']:8.1f} req/s  {result['statuses']}")
+    elapsed = time.perf_counter() - started
+
+    report = {
+        'created_at': datetime.utcnow().isoformat(),
+        'commit': git_commit(),
+        'python': platform.python_version(),
+        'database': database,
+        'rows': rows,
+        'requests_per_scenario': args.requests,
+        'scenarios': results,
+        'total_seconds': round(elapsed, 2),
+        'peak_rss_mb': peak_rss_mb(),
+    }
+    print(f"peak RSS {report['peak_rss_mb']} MB, {elapsed:.1f}s")
+
+    if args.output:
+        with open(args.output, 'w') as report_file:
+            json.dump(report, report_file, indent=2)
+    if args.compare:
+        with open(args.compare) as baseline_file:
+            regressions = compare(report, json.load(baseline_file), args.threshold)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
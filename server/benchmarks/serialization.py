@@ -0,0 +1,89 @@
+"""Throughput of the table list endpoints: ORM objects + json vs column select + fast encoder.
+
+For each table it serializes the same rows two ways:
+
+    orm   select(Model) with load_only, attributes copied into dicts, json.dumps
+          (how /exporttables, /importtables and /taxtables used to work)
+    core  the endpoint's own ListQuery column select, rows zipped into dicts,
+          encoding.dumps (orjson when installed)
+
+It also times the real endpoint through the test client. Run it against a
+database filled by benchmarks.generate:
+
+    cd server && DATABASE_URL=sqlite:////tmp/kam-bench.db python -m benchmarks.serialization --rows 200000
+"""
+import argparse
+import json
+import sys
+import time
+from sqlalchemy import select
+from sqlalchemy.orm import load_only
+from app import create_app
+from models import db
+from encoding import dumps, encode_value, orjson
+from resources import EXPORT_TABLE_QUERY, IMPORT_TABLE_QUERY, TAX_TABLE_QUERY
+
+TABLES = {
+    'exporttables': EXPORT_TABLE_QUERY,
+    'importtables': IMPORT_TABLE_QUERY,
+    'taxtables': TAX_TABLE_QUERY,
+}
+
+
+def orm_path(list_query, rows):
+    model, fields = list_query.model, list_query.fields
+    stmt = select(model).options(load_only(*[getattr(model, field) for field in fields])).order_by(model.id).limit(rows)
+    objects = db.session.execute(stmt).scalars().all()
+    body = json.dumps([{field: getattr(obj, field) for field in fields} for obj in objects], default=encode_value)
+    db.session.expunge_all()
+    return len(objects), len(body)
+
+
+def core_path(list_query, rows):
+    params = list_query.parse({})
+    result = db.session.execute(params.select().limit(rows))
+    records = [params.to_dict(row) for row in result]
+    return len(records), len(dumps(records))
+
+
+def best_of(repeat, function, *args):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = function(*args)
+        timings.append(time.perf_counter() - started)
+    return min(timings), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=200000, help='rows per table (at most)')
+    parser.add_argument('--repeat', type=int, default=3, help='runs per measurement; the best one counts')
+    parser.add_argument('--min-speedup', type=float, help='exit 1 when a large table (10k+ rows) improves less than this')
+    args = parser.parse_args()
+
+    app = create_app()
+    client = app.test_client()
+    print(f"encoder: {'orjson ' + orjson.__version__ if orjson else 'json (install orjson for the fast path)'}")
+
+    failed = False
+    with app.app_context():
+        for table, list_query in TABLES.items():
+            orm_seconds, (rows, orm_bytes) = best_of(args.repeat, orm_path, list_query, args.rows)
+            core_seconds, (_, core_bytes) = best_of(args.repeat, core_path, list_query, args.rows)
+            http_seconds, response = best_of(args.repeat, lambda: client.get(f'/{table}?sort=id').get_data())
+            speedup = orm_seconds / core_seconds if core_seconds else float('inf')
+            print(f'\n== {table}: {rows} rows')
+            print(f'   orm:  {orm_seconds * 1000:9.1f} ms  {rows / orm_seconds:12,.0f} rows/s  {orm_bytes:,} bytes')
+            print(f'   core: {core_seconds * 1000:9.1f} ms  {rows / core_seconds:12,.0f} rows/s  {core_bytes:,} bytes')
+            print(f'   speedup: {speedup:.1f}x')
+            print(f'   GET /{table} (all rows): {http_seconds * 1000:.1f} ms, {len(response):,} bytes')
+            if args.min_speedup and rows >= 10000 and speedup < args.min_speedup:
+                failed = True
+
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,107 @@
+"""Cold-start cost of a worker: importing app, create_app() and the first requests.
+
+Each run is a fresh interpreter under `python -X importtime`, as a new
+gunicorn worker would be. The report gives medians over --runs and the
+slowest modules by cumulative import time. It fails (exit 1) when the
+median import exceeds --max-import-ms, or when a module named in
+--forbid (pandas, numpy, pyarrow and alembic by default) gets imported
+before the first request. tests/test_startup.py runs the same import
+check as part of the test suite.
+
+    cd server && python -m benchmarks.startup --runs 5 --output startup.json
+"""
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+
+# Runs in the child; prints one JSON line with its own timings
+CHILD = '''
+import json, sys, time
+started = time.perf_counter()
+from app import create_app
+imported = time.perf_counter()
+app = create_app()
+created = time.perf_counter()
+heavy = sorted(name for name in {forbid!r} if name in sys.modules)
+client = app.test_client()
+first = {{}}
+for url in {urls!r}:
+    request_started = time.perf_counter()
+    status = client.get(url).status_code
+    first[url] = [round((time.perf_counter() - request_started) * 1000, 2), status]
+print(json.dumps({{
+    'import_ms': round((imported - started) * 1000, 2),
+    'create_app_ms': round((created - imported) * 1000, 2),
+    'first_requests': first,
+    'heavy_modules_at_startup': heavy,
+}}))
+'''
+
+FIRST_REQUEST_URLS = ['/', '/hscodes', '/exports?limit=50']
+FORBID = ['pandas', 'numpy', 'pyarrow', 'alembic']
+IMPORTTIME_RE = re.compile(r'import time:\s+(\d+) \|\s+(\d+) \|\s*(\S+)')
+
+
+def run_once(urls, forbid):
+    code = CHILD.format(urls=urls, forbid=forbid)
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', code],
+                            capture_output=True, text=True, check=True, cwd=os.path.dirname(os.path.dirname(__file__)) or '.')
+    timings = json.loads(result.stdout.strip().splitlines()[-1])
+    # Cumulative microseconds per module, nested imports included
+    timings['modules'] = {match.group(3): int(match.group(2))
+                          for match in map(IMPORTTIME_RE.match, result.stderr.splitlines()) if match}
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--top', type=int, default=15, help='slowest modules to list')
+    parser.add_argument('--max-import-ms', type=float, help='fail when the median import of app takes longer')
+    parser.add_argument('--forbid', default=','.join(FORBID), help='modules that must not load before the first request')
+    parser.add_argument('--output', help='write the JSON report here')
+    args = parser.parse_args()
+    forbid = [name for name in args.forbid.split(',') if name]
+
+    runs = [run_once(FIRST_REQUEST_URLS, forbid) for _ in range(args.runs)]
+    median = lambda values: round(statistics.median(values), 2)
+    slowest = sorted(runs[-1]['modules'].items(), key=lambda item: -item[1])[:args.top]
+    report = {
+        'runs': args.runs,
+        'import_ms': median([run['import_ms'] for run in runs]),
+        'create_app_ms': median([run['create_app_ms'] for run in runs]),
+        'first_request_ms': {url: median([run['first_requests'][url][0] for run in runs]) for url in FIRST_REQUEST_URLS},
+        'first_request_status': runs[-1]['first_requests'],
+        'heavy_modules_at_startup': runs[-1]['heavy_modules_at_startup'],
+        'slowest_imports_ms': {name: round(microseconds / 1000, 2) for name, microseconds in slowest},
+    }
+
+    print(f"import app      {report['import_ms']:9.2f} ms")
+    print(f"create_app()    {report['create_app_ms']:9.2f} ms")
+    for url, milliseconds in report['first_request_ms'].items():
+        print(f'first GET {url:20} {milliseconds:9.2f} ms  ({report["first_request_status"][url][1]})')
+    print('\nslowest imports (cumulative):')
+    for name, milliseconds in report['slowest_imports_ms'].items():
+        print(f'  {name:40} {milliseconds:9.2f} ms')
+
+    if args.output:
+        with open(args.output, 'w') as report_file:
+            json.dump(report, report_file, indent=2)
+
+    failed = False
+    if report['heavy_modules_at_startup']:
+        print(f"\nFAIL: loaded at startup: {', '.join(report['heavy_modules_at_startup'])}")
+        failed = True
+    if args.max_import_ms is not None and report['import_ms'] > args.max_import_ms:
+        print(f"\nFAIL: import took {report['import_ms']} ms, budget {args.max_import_ms} ms")
+        failed = True
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
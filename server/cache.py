@@ -0,0 +1,234 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from flask import make_response, request
+
+
+# Entries with a ttl kept per backend; counters and other entries without one are never evicted
+MAX_ENTRIES = 1000
+
+
+class MemoryBackend:
+    """Per-process store; invalidations are only seen by the worker that made them.
+
+    Entries with a ttl are also evicted least recently used first beyond max_entries.
+    """
+
+    shared = False
+
+    def __init__(self, max_entries=MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._data = {}
+        self._expiring = OrderedDict()
+        # Reentrant: incr() reads and writes under it
+        self._lock = threading.RLock()
+
+    def get(self, key):
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        value, expires = entry
+        if expires is not None and expires < time.time():
+            self.delete(key)
+            return None
+        if expires is not None:
+            with self._lock:
+                if key in self._expiring:
+                    self._expiring.move_to_end(key)
+        return value
+
+    def set(self, key, value, ttl=None):
+        """ttl=None keeps the entry until it is evicted or deleted; ttl=0 does not store it at all."""
+        if ttl == 0:
+            self.delete(key)
+            return
+        with self._lock:
+            self._data[key] = (value, None if ttl is None else time.time() + ttl)
+            if ttl is not None:
+                self._expiring[key] = None
+                self._expiring.move_to_end(key)
+                while len(self._expiring) > self.max_entries:
+                    oldest, _ = self._expiring.popitem(last=False)
+                    self._data.pop(oldest, None)
+            else:
+                self._expiring.pop(key, None)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+            self._expiring.pop(key, None)
+
+    def delete_prefix(self, prefix, keep):
+        """Drop the keys under prefix except keep and keep + ':...'."""
+        for key in [key for key in list(self._data) if key.startswith(prefix)]:
+            if key != keep and not key.startswith(keep + ':'):
+                self.delete(key)
+
+    def incr(self, key):
+        with self._lock:
+            value = (self.get(key) or 0) + 1
+            self.set(key, value)
+            return value
+
+
+class SQLiteBackend:
+    """Store shared by every worker on the host through a local SQLite file."""
+
+    shared = True
+
+    def __init__(self, path, max_entries=MAX_ENTRIES):
+        self.path = path
+        self.max_entries = max_entries
+        self._local = threading.local()
+        with self._connection() as conn:
+            conn.execute('CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, value TEXT NOT NULL, expires REAL)')
+            conn.execute('CREATE INDEX IF NOT EXISTS ix_cache_expires ON cache (expires)')
+
+    def _connection(self):
+        # Per thread and per process: a connection must not cross a fork (gunicorn --preload)
+        conn, pid = getattr(self._local, 'conn', (None, None))
+        if conn is None or pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5)
+            conn.execute('PRAGMA journal_mode=WAL')
+            self._local.conn = (conn, os.getpid())
+        return conn
+
+    def get(self, key):
+        row = self._connection().execute('SELECT value, expires FROM cache WHERE key = ?', (key,)).fetchone()
+        if row is None or (row[1] is not None and row[1] < time.time()):
+            return None
+        return json.loads(row[0])
+
+    def set(self, key, value, ttl=None):
+        """ttl=None keeps the entry until it is evicted or deleted; ttl=0 does not store it at all."""
+        if ttl == 0:
+            self.delete(key)
+            return
+        now = time.time()
+        with self._connection() as conn:
+            conn.execute('INSERT OR REPLACE INTO cache (key, value, expires) VALUES (?, ?, ?)',
+                         (key, json.dumps(value), None if ttl is None else now + ttl))
+            if ttl is not None:
+                # Expired rows are never read again, and beyond max_entries the soonest to expire go first
+                conn.execute('DELETE FROM cache WHERE expires < ?', (now,))
+                conn.execute('DELETE FROM cache WHERE key IN (SELECT key FROM cache WHERE expires IS NOT NULL '
+                             'ORDER BY expires DESC LIMIT -1 OFFSET ?)', (self.max_entries,))
+
+    def delete(self, key):
+        with self._connection() as conn:
+            conn.execute('DELETE FROM cache WHERE key = ?', (key,))
+
+    def delete_prefix(self, prefix, keep):
+        """Drop the keys under prefix except keep and keep + ':...'."""
+        with self._connection() as conn:
+            conn.execute('DELETE FROM cache WHERE substr(key, 1, ?) = ? AND key != ? AND substr(key, 1, ?) != ?',
+                         (len(prefix), prefix, keep, len(keep) + 1, keep + ':'))
+
+    def incr(self, key):
+        conn = self._connection()
+        with conn:
+            conn.execute('BEGIN IMMEDIATE')
+            row = conn.execute('SELECT value FROM cache WHERE key = ?', (key,)).fetchone()
+            value = (json.loads(row[0]) if row else 0) + 1
+            conn.execute('INSERT OR REPLACE INTO cache (key, value, expires) VALUES (?, ?, NULL)', (key, json.dumps(value)))
+        return value
+
+
+def backend_from_url(url, max_entries=MAX_ENTRIES):
+    if url == 'memory':
+        return MemoryBackend(max_entries)
+    if url.startswith('sqlite:///'):
+        return SQLiteBackend(os.path.expanduser(url[len('sqlite:///'):]), max_entries)
+    raise ValueError(f'Unsupported REFERENCE_CACHE_URL: {url}')
+
+
+def default_cache_url(app):
+    """A SQLite file in the instance folder, so web workers see invalidations made by the CLI, seed.py and each other.
+
+    It is named after the database, so two databases never share cached bodies.
+    """
+    os.makedirs(app.instance_path, exist_ok=True)
+    database = hashlib.sha1(str(app.config.get('SQLALCHEMY_DATABASE_URI')).encode()).hexdigest()[:12]
+    return f"sqlite:///{os.path.join(app.instance_path, f'reference-cache-{database}.db')}"
+
+
+class ReferenceCache:
+    """Serialized reference-data responses keyed by a per-table version.
+
+    Writes call invalidate(table), which bumps the version so the next read
+    reloads from the database. The ETag is a hash of the body, so it stays
+    valid across workers and restarts.
+    """
+
+    def __init__(self):
+        self.backend = MemoryBackend()
+        self.max_age = 300
+        self.ttl = 3600
+
+    def init_app(self, app):
+        app.config.setdefault('REFERENCE_CACHE_URL', os.environ.get('REFERENCE_CACHE_URL') or default_cache_url(app))
+        app.config.setdefault('REFERENCE_CACHE_MAX_AGE', 300)
+        app.config.setdefault('REFERENCE_CACHE_TTL', 3600)
+        app.config.setdefault('REFERENCE_CACHE_MAX_ENTRIES', MAX_ENTRIES)
+        self.backend = backend_from_url(app.config['REFERENCE_CACHE_URL'], app.config['REFERENCE_CACHE_MAX_ENTRIES'])
+        self.max_age = app.config['REFERENCE_CACHE_MAX_AGE']
+        self.ttl = app.config['REFERENCE_CACHE_TTL']
+        app.extensions['reference_cache'] = self
+
+    def outlived(self, built):
+        """Whether something built at time.monotonic() == built is older than the ttl (never with ttl None)."""
+        return self.ttl is not None and time.monotonic() - built >= self.ttl
+
+    def version(self, table):
+        return self.backend.get(f'version:{table}') or 0
+
+    def changed_at(self, table):
+        """Unix time of the table's last invalidation; the first time it is asked for if none was recorded."""
+        changed = self.backend.get(f'changed:{table}')
+        if changed is None:
+            changed = int(time.time())
+            self.backend.set(f'changed:{table}', changed)
+        return changed
+
+    def invalidate(self, *tables):
+        for table in tables:
+            self.backend.incr(f'version:{table}')
+            self.backend.set(f'changed:{table}', int(time.time()))
+
+    def get(self, table, loader, key=None):
+        # key tells apart several cached responses built from the same table
+        current = f'{table}:{self.version(table)}'
+        key = current + (f':{key}' if key else '')
+        entry = self.backend.get(key)
+        if entry is None:
+            body = json.dumps(loader(), separators=(',', ':'))
+            entry = {'etag': hashlib.sha1(body.encode()).hexdigest(), 'body': body}
+            # Entries of earlier versions can no longer be read
+            self.backend.delete_prefix(f'{table}:', keep=current)
+            self.backend.set(key, entry, ttl=self.ttl)
+        return entry
+
+    def response(self, table, loader, private=False, key=None):
+        entry = self.get(table, loader, key)
+        if request.if_none_match.contains_weak(entry['etag']):
+            resp = make_response('', 304)
+        else:
+            resp = make_response(entry['body'])
+            resp.mimetype = 'application/json'
+        resp.set_etag(entry['etag'])
+        resp.cache_control.max_age = self.max_age
+        if private:
+            resp.cache_control.private = True
+        else:
+            resp.cache_control.public = True
+        return resp
+
+
+reference_cache = ReferenceCache()
+
+# Loaded users per worker, keyed by the Flask-Login user id
+user_cache = MemoryBackend()
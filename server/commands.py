@@ -0,0 +1,79 @@
+import click
+from flask.cli import with_appcontext
+from rollups import refresh_export_rollup, refresh_import_rollup
+from reports import PARTITION_KINDS, build_reports
+from snapshots import SNAPSHOT_TABLES, build_snapshots, load_manifest
+
+
+@click.command('import-exports')
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--force', is_flag=True, help='Reload the file even if its content was already imported.')
+@with_appcontext
+def import_exports_command(path, force):
+    """Incrementally upsert a customs export XLS/CSV file."""
+    # importer pulls in pandas, which the web app does not need at startup
+    from importer import import_exports_file, format_report
+
+    report = import_exports_file(path, force=force)
+    if report is None:
+        click.echo(f'{path} was already imported; nothing to do.')
+        return
+    click.echo(format_report(report))
+
+    # Once snapshots are in use, keep them current with each import
+    if load_manifest():
+        rebuilt = build_snapshots(['exports'])
+        click.echo(f"Rebuilt {len(rebuilt['exports'])} export snapshot partitions.")
+
+
+@click.group('rollups')
+def rollups_command():
+    """Maintain the monthly rollup tables."""
+
+
+@rollups_command.command('rebuild')
+@with_appcontext
+def rebuild_rollups_command():
+    """Recompute the export and import monthly rollups from the fact tables."""
+    refresh_export_rollup()
+    refresh_import_rollup()
+    click.echo('Rebuilt export and import monthly rollups.')
+
+
+@click.group('snapshots')
+def snapshots_command():
+    """Maintain the columnar snapshots served under /snapshots."""
+
+
+@snapshots_command.command('build')
+@click.option('--table', 'tables', multiple=True, type=click.Choice(list(SNAPSHOT_TABLES)), help='Limit to these tables.')
+@click.option('--full', is_flag=True, help='Rewrite every partition, not only the changed ones.')
+@with_appcontext
+def build_snapshots_command(tables, full):
+    """Write changed year/month partitions as Parquet or Arrow files."""
+    for table, partitions in build_snapshots(list(tables) or None, full=full).items():
+        click.echo(f"{table}: rebuilt {len(partitions)} partitions{': ' + ', '.join(partitions) if partitions else ''}")
+
+
+@click.group('reports')
+def reports_command():
+    """Offline trade reports over the fact tables."""
+
+
+@reports_command.command('build')
+@click.option('--year', type=int, required=True)
+@click.option('--partition', type=click.Choice(PARTITION_KINDS), default='month', show_default=True,
+              help='Split the work by month or by HS chapter.')
+@click.option('--workers', type=int, help='Worker processes; defaults to the number of CPUs.')
+@click.option('--output', type=click.Path(file_okay=False), help='Directory for the CSV files; defaults to instance/reports/<year>.')
+@click.option('--compare', is_flag=True, help='Also run single-process and report the speedup.')
+@with_appcontext
+def build_reports_command(year, partition, workers, output, compare):
+    """Per-destination and per-HS-code export and import summaries for one year."""
+    summary = build_reports(year, partition, workers, output, compare)
+    click.echo(f"{summary['partitions']} {partition} partitions on {summary['workers']} workers: {summary['seconds']}s")
+    if compare:
+        click.echo(f"single process: {summary['single_process_seconds']}s, speedup {summary['speedup']}x")
+    for name, rows in summary['rows'].items():
+        click.echo(f'  {name}.csv: {rows} rows')
+    click.echo(f"Wrote {summary['output']}")
@@ -0,0 +1,84 @@
+import gzip
+import zlib
+from flask import request
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE_MIMETYPES = {'application/json', 'application/x-ndjson', 'text/csv', 'text/plain', 'text/html'}
+
+
+def _gzip_stream(chunks, level):
+    # One gzip member over the whole stream, flushed per chunk so rows still arrive as they are read
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        if isinstance(chunk, str):
+            chunk = chunk.encode()
+        data = compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+class Compression:
+    """gzip, or brotli when it is installed, for responses above COMPRESS_MIN_SIZE bytes.
+
+    Streamed NDJSON/CSV bodies are gzipped chunk by chunk. Files served
+    with send_file (snapshots are already compressed) are left alone.
+    """
+
+    def __init__(self):
+        self.min_size = 1024
+        self.level = 6
+        self.brotli_quality = 4
+
+    def init_app(self, app):
+        app.config.setdefault('COMPRESS_MIN_SIZE', 1024)
+        app.config.setdefault('COMPRESS_LEVEL', 6)
+        app.config.setdefault('COMPRESS_BROTLI_QUALITY', 4)
+        self.min_size = app.config['COMPRESS_MIN_SIZE']
+        self.level = app.config['COMPRESS_LEVEL']
+        self.brotli_quality = app.config['COMPRESS_BROTLI_QUALITY']
+        app.after_request(self._after_request)
+        app.extensions['compression'] = self
+
+    def encoding(self):
+        offered = ['br', 'gzip'] if brotli is not None else ['gzip']
+        return request.accept_encodings.best_match(offered)
+
+    def _after_request(self, response):
+        if response.mimetype not in COMPRESSIBLE_MIMETYPES:
+            return response
+        response.vary.add('Accept-Encoding')
+        if (response.status_code != 200 or response.direct_passthrough or request.method == 'HEAD'
+                or 'Content-Encoding' in response.headers):
+            return response
+
+        encoding = self.encoding()
+        if encoding is None:
+            return response
+        if response.is_streamed:
+            if encoding != 'gzip' and not request.accept_encodings['gzip']:
+                return response
+            response.response = _gzip_stream(response.response, self.level)
+            response.headers['Content-Encoding'] = 'gzip'
+        else:
+            body = response.get_data()
+            if len(body) < self.min_size:
+                return response
+            if encoding == 'br':
+                response.set_data(brotli.compress(body, quality=self.brotli_quality))
+            else:
+                response.set_data(gzip.compress(body, compresslevel=self.level, mtime=0))
+            response.headers['Content-Encoding'] = encoding
+
+        # Same content, different bytes: a strong validator must not survive the encoding
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            response.set_etag(etag, weak=True)
+        return response
+
+
+compression = Compression()
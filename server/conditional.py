@@ -0,0 +1,67 @@
+import hashlib
+from datetime import datetime, timezone
+from flask import current_app, g, make_response, request
+from cache import reference_cache
+
+
+class ConditionalGet:
+    """Weak ETags and Last-Modified from reference_cache's per-table versions.
+
+    A resource opts in by naming the tables its GET reads from:
+
+        class ExportTablesResource(Resource):
+            conditional_tables = ('exporttables',)
+
+    The validators only come from the cache backend, so a matching
+    If-None-Match or If-Modified-Since gets its 304 before the view runs and
+    without a database query. Every write to those tables has to call
+    reference_cache.invalidate(). Validators are only sent while the cache
+    backend is shared: with REFERENCE_CACHE_URL=memory, writes from the CLI or
+    other workers would never change them.
+    """
+
+    def init_app(self, app):
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+        app.extensions['conditional_get'] = self
+
+    def validators(self, tables):
+        versions = ','.join(f'{table}={reference_cache.version(table)}' for table in tables)
+        # Query string and Accept pick the representation (filters, JSON vs NDJSON/CSV)
+        key = f'{request.endpoint}|{request.full_path}|{request.headers.get("Accept", "")}|{versions}'
+        etag = hashlib.sha1(key.encode()).hexdigest()[:20]
+        changed = max(reference_cache.changed_at(table) for table in tables)
+        return etag, datetime.fromtimestamp(changed, timezone.utc)
+
+    def _before_request(self):
+        if request.method not in ('GET', 'HEAD') or not reference_cache.backend.shared:
+            return None
+        view = current_app.view_functions.get(request.endpoint)
+        tables = getattr(getattr(view, 'view_class', None), 'conditional_tables', None)
+        if not tables:
+            return None
+
+        etag, last_modified = self.validators(tables)
+        g.conditional = (etag, last_modified)
+        if request.if_none_match:
+            fresh = request.if_none_match.contains_weak(etag)
+        else:
+            fresh = request.if_modified_since is not None and last_modified <= request.if_modified_since
+        if fresh:
+            return make_response('', 304)
+        return None
+
+    def _after_request(self, response):
+        if 'conditional' not in g or response.status_code not in (200, 304):
+            return response
+        etag, last_modified = g.conditional
+        # Responses with their own validator (reference_cache bodies) keep it
+        if 'ETag' not in response.headers:
+            response.set_etag(etag, weak=True)
+            response.last_modified = last_modified
+            if not response.cache_control:
+                response.cache_control.no_cache = True
+        return response
+
+
+conditional_get = ConditionalGet()
@@ -0,0 +1,103 @@
+import os
+from sqlalchemy import event
+
+
+def env_int(name, default):
+    value = os.environ.get(name)
+    return int(value) if value not in (None, '') else default
+
+
+def env_bool(name, default):
+    value = os.environ.get(name)
+    if value in (None, ''):
+        return default
+    return value.lower() in ('1', 'true', 'yes', 'on')
+
+
+def database_url():
+    url = os.environ.get('DATABASE_URL', 'sqlite:///app.db')
+    # Heroku-style URLs use the scheme SQLAlchemy dropped in 1.4
+    if url.startswith('postgres://'):
+        url = 'postgresql://' + url[len('postgres://'):]
+    return url
+
+
+def sqlite_pragmas():
+    return {
+        'journal_mode': os.environ.get('SQLITE_JOURNAL_MODE', 'WAL'),
+        'synchronous': os.environ.get('SQLITE_SYNCHRONOUS', 'NORMAL'),
+        'busy_timeout': env_int('SQLITE_BUSY_TIMEOUT_MS', 5000),
+        'mmap_size': env_int('SQLITE_MMAP_SIZE', 256 * 1024 * 1024),
+    }
+
+
+def engine_options(url):
+    if url.startswith('sqlite'):
+        # Locking is handled by busy_timeout; pysqlite's own timeout is in seconds
+        return {'connect_args': {'timeout': env_int('SQLITE_BUSY_TIMEOUT_MS', 5000) / 1000}}
+    return {
+        'pool_size': env_int('DB_POOL_SIZE', 5),
+        'max_overflow': env_int('DB_MAX_OVERFLOW', 10),
+        'pool_timeout': env_int('DB_POOL_TIMEOUT', 30),
+        'pool_recycle': env_int('DB_POOL_RECYCLE', 1800),
+        'pool_pre_ping': env_bool('DB_POOL_PRE_PING', True),
+    }
+
+
+class Config:
+    SECRET_KEY = os.environ.get('SECRET_KEY')
+    # Any werkzeug method string; existing hashes are upgraded on the next successful login
+    PASSWORD_HASH_METHOD = os.environ.get('PASSWORD_HASH_METHOD', 'scrypt:32768:8:1')
+    USER_CACHE_TTL = env_int('USER_CACHE_TTL', 60)
+
+    SQLALCHEMY_DATABASE_URI = database_url()
+    SQLALCHEMY_TRACK_MODIFICATIONS = False
+    SQLALCHEMY_ENGINE_OPTIONS = engine_options(SQLALCHEMY_DATABASE_URI)
+    SQLITE_PRAGMAS = sqlite_pragmas()
+
+    # Answer /exports/aggregate from export_monthly_rollup instead of scanning exporttables
+    AGGREGATE_FROM_ROLLUPS = env_bool('AGGREGATE_FROM_ROLLUPS', True)
+
+    # Columnar snapshots: 'parquet' or 'arrow' (IPC file); SNAPSHOT_DIR defaults to instance/snapshots
+    SNAPSHOT_FORMAT = os.environ.get('SNAPSHOT_FORMAT', 'parquet')
+    SNAPSHOT_DIR = os.environ.get('SNAPSHOT_DIR')
+
+    # POST /importtables/batch: batches above IMPORT_SYNC_LIMIT rows go to a pool of IMPORT_WORKERS threads
+    IMPORT_SYNC_LIMIT = env_int('IMPORT_SYNC_LIMIT', 1000)
+    IMPORT_WORKERS = env_int('IMPORT_WORKERS', 2)
+    IMPORT_BATCH_SIZE = env_int('IMPORT_BATCH_SIZE', 5000)
+
+    # X-Query-Count and Server-Timing on every response; warn above this many statements per request
+    METRICS_HEADERS = env_bool('METRICS_HEADERS', False)
+    METRICS_QUERY_WARN_THRESHOLD = env_int('METRICS_QUERY_WARN_THRESHOLD', 50)
+
+    # gzip (brotli when installed) for JSON/NDJSON/CSV bodies of at least COMPRESS_MIN_SIZE bytes
+    COMPRESS_MIN_SIZE = env_int('COMPRESS_MIN_SIZE', 1024)
+    COMPRESS_LEVEL = env_int('COMPRESS_LEVEL', 6)
+    COMPRESS_BROTLI_QUALITY = env_int('COMPRESS_BROTLI_QUALITY', 4)
+
+    # Cacheable GETs read from READ_REPLICA_URL, or with READ_SNAPSHOT from a backup-API copy of the
+    # SQLite primary (READ_SNAPSHOT_PATH, default instance/read-snapshot.db), while it lags by at most REPLICA_MAX_LAG seconds
+    READ_REPLICA_URL = os.environ.get('READ_REPLICA_URL')
+    READ_SNAPSHOT = env_bool('READ_SNAPSHOT', False)
+    READ_SNAPSHOT_PATH = os.environ.get('READ_SNAPSHOT_PATH')
+    REPLICA_MAX_LAG = env_int('REPLICA_MAX_LAG', 5)
+
+
+def pragma_listener(pragmas):
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f'PRAGMA {name}={value}')
+        cursor.close()
+    return set_pragmas
+
+
+def init_engine_events(app, db):
+    pragmas = app.config.get('SQLITE_PRAGMAS')
+    if not pragmas:
+        return
+    with app.app_context():
+        for engine in db.engines.values():
+            if engine.dialect.name == 'sqlite':
+                event.listen(engine, 'connect', pragma_listener(pragmas))
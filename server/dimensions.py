@@ -0,0 +1,70 @@
+import threading
+import time
+from sqlalchemy import select
+from models import db, Country, HsCode, Product
+from cache import reference_cache
+
+
+class DimensionTable:
+    """One dimension's attributes as parallel lists indexed by id.
+
+    Ids are small dense integers, so a list lookup replaces a join and no
+    ORM objects are kept; gaps and unknown ids read as None.
+    """
+
+    __slots__ = ('columns', '_values')
+
+    def __init__(self, columns, rows):
+        self.columns = columns
+        size = max((row[0] for row in rows), default=-1) + 1
+        self._values = {column: [None] * size for column in columns}
+        for row in rows:
+            for column, value in zip(columns, row[1:]):
+                self._values[column][row[0]] = value
+
+    def get(self, name, id):
+        values = self._values[name]
+        if id is None or not 0 <= id < len(values):
+            return None
+        return values[id]
+
+
+class Dimensions:
+    __slots__ = ('countries', 'hscodes', 'products')
+
+    def __init__(self):
+        self.countries = DimensionTable(['code', 'name'], db.session.execute(select(Country.id, Country.code, Country.name)).all())
+        self.hscodes = DimensionTable(['code', 'description'],
+                                      db.session.execute(select(HsCode.id, HsCode.code, HsCode.description)).all())
+        self.products = DimensionTable(['name', 'hs_code_id'],
+                                       db.session.execute(select(Product.id, Product.name, Product.hs_code_id)).all())
+
+
+DIMENSION_TABLES = ('countries', 'hscodes', 'products')
+
+_dimensions = None
+_dimension_versions = None
+_dimensions_loaded = 0
+_dimensions_lock = threading.Lock()
+
+
+def dimensions():
+    """The per-worker registry, reloaded when any of the reference tables' cache version moves.
+
+    Like the search index it is also reloaded after REFERENCE_CACHE_TTL, so a
+    missed invalidation cannot keep old names forever.
+    """
+    global _dimensions, _dimension_versions, _dimensions_loaded
+    versions = tuple(reference_cache.version(table) for table in DIMENSION_TABLES)
+
+    def stale():
+        return _dimensions is None or versions != _dimension_versions \
+            or reference_cache.outlived(_dimensions_loaded)
+
+    if stale():
+        with _dimensions_lock:
+            if stale():
+                _dimensions = Dimensions()
+                _dimension_versions = versions
+                _dimensions_loaded = time.monotonic()
+    return _dimensions
@@ -0,0 +1,53 @@
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from uuid import UUID
+from flask import current_app, make_response
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def encode_value(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    # PostgreSQL returns numeric for SUM/AVG/EXTRACT; keep them numbers, as SQLite's floats are
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, UUID):
+        return str(value)
+    return DefaultJSONProvider.default(value)
+
+
+def dumps(data, pretty=False, sort_keys=False):
+    """JSON as UTF-8 bytes; orjson when it is installed, the json module otherwise. Dates become ISO 8601."""
+    if orjson is not None:
+        option = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+        if pretty:
+            option |= orjson.OPT_INDENT_2
+        if sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        return orjson.dumps(data, default=encode_value, option=option)
+    return json.dumps(data, default=encode_value, sort_keys=sort_keys,
+                      indent=2 if pretty else None, separators=None if pretty else (',', ':')).encode()
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """jsonify() through dumps(); compact unless app.json.compact is False or the app is in debug mode."""
+
+    def pretty(self):
+        return self.compact is False or (self.compact is None and self._app.debug)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(dumps(obj, self.pretty(), self.sort_keys) + b'\n', mimetype=self.mimetype)
+
+
+def output_json(data, code, headers=None):
+    """flask-restful representation for application/json, using the app's JSON settings."""
+    resp = make_response(dumps(data, current_app.json.pretty()) + b'\n', code)
+    resp.headers.extend(headers or {})
+    return resp
@@ -0,0 +1,25 @@
+import re
+
+# Digits of each level of the HS nomenclature below the full code
+HS_LEVELS = {'chapter': 2, 'heading': 4, 'subheading': 6}
+
+
+def normalize_hs_code(code):
+    # Digits only: '4804.11.00' -> '48041100'
+    return re.sub(r'\D', '', str(code))
+
+
+def hs_levels(code):
+    """The digits of a code and its chapter, heading and subheading; a level is None when the code is shorter."""
+    digits = normalize_hs_code(code) if code is not None else None
+    levels = {'digits': digits or None}
+    for level, length in HS_LEVELS.items():
+        levels[level] = digits[:length] if digits and len(digits) >= length else None
+    return levels
+
+
+def hs_prefix_range(prefix):
+    """Bounds such that low <= digits < high holds exactly for the codes starting with prefix: '48' -> ('48', '48:')."""
+    digits = normalize_hs_code(prefix)
+    # ':' sorts right after '9', so every continuation of the prefix stays below it
+    return digits, digits + ':'
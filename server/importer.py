@@ -0,0 +1,334 @@
+import hashlib
+import math
+import numbers
+import os
+import time
+from datetime import datetime
+import numpy as np
+import pandas as pd
+from sqlalchemy import insert, select
+from sqlalchemy.dialects import postgresql, sqlite
+from models import db, Country, HsCode, Product, ExportTable, ImportTable, LoadManifest
+from cache import reference_cache
+from rollups import refresh_export_rollup, refresh_import_rollup
+
+REQUIRED_COLUMNS = ['SHORT_DESC', 'HS CODE', 'Year', 'Month', 'DESTINATION', 'QUANTITY', 'UNIT', 'FOB_VALUE']
+
+# Rows written per transaction
+BATCH_SIZE = 5000
+
+# Keys of one import declaration posted to /importtables/batch
+DECLARATION_FIELDS = ['reg_date', 'entry_number', 'entry_status', 'quantity', 'discharge_port',
+                      'origin', 'destination', 'hscode', 'product_id']
+TEXT_DECLARATION_FIELDS = ['reg_date', 'entry_status', 'discharge_port', 'origin', 'destination', 'hscode']
+
+# Integer columns are 64-bit in SQLite and PostgreSQL
+INT64_MIN, INT64_MAX = -2 ** 63, 2 ** 63 - 1
+
+# Columns of uq_exporttables_natural_key; a source row with the same key replaces the stored one
+EXPORT_NATURAL_KEY = ['export_date', 'destination_id', 'hscode_id', 'product_id', 'unit']
+
+
+def normalize_hs_codes(codes):
+    # Remove all non-numeric characters: 'xxxx.xx.xx' -> 'xxxxxxxx'
+    return codes.astype(str).str.replace(r'\D', '', regex=True)
+
+
+def read_exports_file(path):
+    if os.path.splitext(path)[1].lower() == '.csv':
+        return pd.read_csv(path, float_precision='round_trip')
+    return pd.read_excel(path)
+
+
+def _frame(stmt, columns):
+    return pd.DataFrame(db.session.execute(stmt).all(), columns=columns)
+
+
+def _none_for_nan(frame):
+    return frame.astype(object).where(frame.notna(), None)
+
+
+def _write_batches(model, records, batch_size):
+    for start in range(0, len(records), batch_size):
+        db.session.execute(insert(model), records[start:start + batch_size])
+        db.session.commit()
+
+
+def _upsert_batches(records, batch_size, update=True):
+    dialect = db.engine.dialect.name
+    if dialect not in ('sqlite', 'postgresql') and not update:
+        # Duplicates within the file are already dropped; plain inserts are all that is left
+        _write_batches(ExportTable, records, batch_size)
+        return len(records)
+    if dialect not in ('sqlite', 'postgresql'):
+        raise RuntimeError(f'Incremental import is not supported on {dialect}')
+    dialect_insert = sqlite.insert if dialect == 'sqlite' else postgresql.insert
+
+    table = ExportTable.__table__
+    stmt = dialect_insert(table)
+    if update:
+        # Only touch rows whose measures actually changed, so re-loading a file writes nothing
+        stmt = stmt.on_conflict_do_update(
+            index_elements=EXPORT_NATURAL_KEY,
+            set_={'fob_value': stmt.excluded.fob_value, 'quantity': stmt.excluded.quantity},
+            where=table.c.fob_value.is_distinct_from(stmt.excluded.fob_value) |
+                  table.c.quantity.is_distinct_from(stmt.excluded.quantity)
+        )
+    else:
+        stmt = stmt.on_conflict_do_nothing(index_elements=EXPORT_NATURAL_KEY)
+
+    written = 0
+    for start in range(0, len(records), batch_size):
+        written += db.session.connection().execute(stmt, records[start:start + batch_size]).rowcount
+        db.session.commit()
+    return written
+
+
+def resolve_products(df, batch_size=BATCH_SIZE):
+    # One row per distinct (name, HS code); insert only the pairs that are not in the table yet
+    wanted = df[['SHORT_DESC', 'hscode_id']].drop_duplicates().rename(columns={'SHORT_DESC': 'name'})
+    existing = _frame(select(Product.id, Product.name, Product.hs_code_id), ['product_id', 'name', 'hscode_id'])
+    missing = wanted.merge(existing, on=['name', 'hscode_id'], how='left')
+    missing = missing[missing['product_id'].isna()]
+
+    records = [{'name': name, 'hs_code_id': int(hscode_id)} for name, hscode_id in zip(missing['name'], missing['hscode_id'])]
+    _write_batches(Product, records, batch_size)
+    if records:
+        reference_cache.invalidate('products')
+
+    products = _frame(select(Product.id, Product.name, Product.hs_code_id), ['product_id', 'SHORT_DESC', 'hscode_id'])
+    return df.merge(products, on=['SHORT_DESC', 'hscode_id'], how='left'), len(records)
+
+
+def load_exports(df, batch_size=BATCH_SIZE, upsert=False):
+    started = time.perf_counter()
+
+    missing_columns = [column for column in REQUIRED_COLUMNS if column not in df.columns]
+    if missing_columns:
+        raise ValueError(f"XLS file must contain the following columns: {', '.join(REQUIRED_COLUMNS)}")
+
+    rows_read = len(df)
+    df = df[REQUIRED_COLUMNS].copy()
+    df['hs_code'] = normalize_hs_codes(df['HS CODE'])
+    df['export_date'] = pd.to_datetime(
+        pd.DataFrame({'year': df['Year'], 'month': df['Month'], 'day': 1}), errors='coerce'
+    )
+
+    # Resolve HS codes and destination countries with one lookup query each
+    hscodes = _frame(select(HsCode.id, HsCode.code), ['hscode_id', 'code'])
+    hscodes['hs_code'] = normalize_hs_codes(hscodes['code'])
+    df = df.merge(hscodes[['hs_code', 'hscode_id']], on='hs_code', how='left')
+
+    countries = _frame(select(Country.id, Country.code), ['destination_id', 'DESTINATION'])
+    df = df.merge(countries, on='DESTINATION', how='left')
+
+    rejected = {
+        'unknown HS code': df['hscode_id'].isna(),
+        'unknown destination': df['hscode_id'].notna() & df['destination_id'].isna(),
+        'invalid year/month': df['hscode_id'].notna() & df['destination_id'].notna() & df['export_date'].isna(),
+    }
+    rejected_examples = {
+        'unknown HS code': df.loc[rejected['unknown HS code'], 'HS CODE'],
+        'unknown destination': df.loc[rejected['unknown destination'], 'DESTINATION'],
+        'invalid year/month': df.loc[rejected['invalid year/month'], 'Year'].astype(str) + '-' +
+                              df.loc[rejected['invalid year/month'], 'Month'].astype(str),
+    }
+
+    # Products are created for every row with a known HS code, like the original seed did
+    df = df[df['hscode_id'].notna()].astype({'hscode_id': int})
+    df, products_inserted = resolve_products(df, batch_size)
+
+    valid = df[df['destination_id'].notna() & df['export_date'].notna()]
+    exports = _none_for_nan(pd.DataFrame({
+        'fob_value': valid['FOB_VALUE'],
+        'quantity': valid['QUANTITY'],
+        'unit': valid['UNIT'].fillna(''),
+        'export_date': valid['export_date'],
+        'destination_id': valid['destination_id'].astype(int),
+        'hscode_id': valid['hscode_id'].astype(int),
+        'product_id': valid['product_id'].astype(int),
+    }))
+    # The natural key is unique: a repeated row would fail its batch after earlier ones were committed
+    rejected['duplicate natural key'] = exports.duplicated(EXPORT_NATURAL_KEY, keep='last')
+    duplicates = valid.loc[rejected['duplicate natural key']]
+    rejected_examples['duplicate natural key'] = (duplicates['HS CODE'].astype(str) + ' ' + duplicates['DESTINATION'] +
+                                                  ' ' + duplicates['export_date'].dt.strftime('%Y-%m'))
+    exports = exports[~rejected['duplicate natural key']]
+    written = _upsert_batches(exports.to_dict('records'), batch_size, update=upsert)
+    # Without upsert, rows already in the table are left alone rather than failing the load
+    already_stored = 0 if upsert else len(exports) - written
+
+    # Keep the monthly rollup in step with the months this file touched
+    months = set(zip(valid['export_date'].dt.year, valid['export_date'].dt.month))
+    refresh_export_rollup(months)
+
+    elapsed = time.perf_counter() - started
+    return {
+        'rows_read': rows_read,
+        'exports_written': written,
+        'products_inserted': products_inserted,
+        'rejected': {**{reason: int(mask.sum()) for reason, mask in rejected.items() if mask.any()},
+                     **({'already stored': already_stored} if already_stored else {})},
+        'rejected_examples': {reason: sorted(values.astype(str).unique())[:10]
+                              for reason, values in rejected_examples.items() if len(values)},
+        'seconds': elapsed,
+        'rows_per_second': rows_read / elapsed if elapsed else 0.0,
+    }
+
+
+def _missing(value):
+    return value is None or value is pd.NA or (isinstance(value, float) and math.isnan(value))
+
+
+def _integer(value):
+    """value as an int, None when missing; ValueError for booleans, fractions, non-numbers and out-of-range values."""
+    if _missing(value):
+        return None
+    if isinstance(value, str):
+        try:
+            value = int(value.strip())
+        except ValueError:
+            value = float(value)
+    if isinstance(value, (bool, np.bool_)):
+        raise ValueError(value)
+    if isinstance(value, numbers.Integral):
+        value = int(value)
+    elif isinstance(value, numbers.Real) and float(value).is_integer():
+        value = int(value)
+    else:
+        raise ValueError(value)
+    if not INT64_MIN <= value <= INT64_MAX:
+        raise ValueError(value)
+    return value
+
+
+def _integers(values):
+    # Checked value by value: a float round trip would lose precision above 2**53
+    parsed, invalid = [], []
+    for value in values:
+        try:
+            parsed.append(_integer(value))
+            invalid.append(False)
+        except ValueError:
+            parsed.append(None)
+            invalid.append(True)
+    return pd.Series(pd.array(parsed, dtype='Int64'), index=values.index), pd.Series(invalid, index=values.index)
+
+
+def _not_text(values):
+    # Objects, lists, numbers and booleans would otherwise be parsed or stored as their string form
+    return values.map(lambda value: not (_missing(value) or isinstance(value, str))).astype(bool)
+
+
+def load_import_declarations(records, batch_size=BATCH_SIZE):
+    """Validate and insert import declarations (dicts keyed by DECLARATION_FIELDS).
+
+    Country and HS codes are resolved with one query each. Rows with any
+    problem are skipped and reported as {'index', 'errors': {field: message}}.
+    """
+    started = time.perf_counter()
+    is_object = pd.Series([isinstance(record, dict) for record in records], dtype=bool)
+    df = pd.DataFrame.from_records([record if isinstance(record, dict) else {} for record in records],
+                                   columns=DECLARATION_FIELDS)
+
+    not_text = {field: _not_text(df[field]) for field in TEXT_DECLARATION_FIELDS}
+    countries = dict(db.session.execute(select(Country.code, Country.id)).all())
+    hscodes = _frame(select(HsCode.id, HsCode.code), ['hscode_id', 'code'])
+    hscode_ids = dict(zip(normalize_hs_codes(hscodes['code']), hscodes['hscode_id']))
+
+    df['reg_date'] = pd.to_datetime(df['reg_date'].astype('string'), errors='coerce', format='ISO8601', utc=True) \
+        .dt.tz_localize(None)
+    df['origin_id'] = df['origin'].astype('string').str.upper().map(countries)
+    df['destination_id'] = df['destination'].astype('string').str.upper().map(countries)
+    df['hscode_id'] = normalize_hs_codes(df['hscode'].fillna('')).map(hscode_ids)
+    df['entry_number'], bad_entry_number = _integers(df['entry_number'])
+    df['quantity'], bad_quantity = _integers(df['quantity'])
+    df['product_id'], bad_product_id = _integers(df['product_id'])
+    wanted_products = [int(product_id) for product_id in df['product_id'].dropna().unique()]
+    known_products = set(db.session.execute(select(Product.id).where(Product.id.in_(wanted_products))).scalars()) \
+        if wanted_products else set()
+
+    checks = {
+        'reg_date': (df['reg_date'].isna() | not_text['reg_date'], 'required, as an ISO 8601 date'),
+        'origin': (df['origin_id'].isna() | not_text['origin'], 'unknown country code'),
+        'destination': (df['destination'].notna() & df['destination_id'].isna() | not_text['destination'],
+                        'unknown country code'),
+        'hscode': (df['hscode_id'].isna() | not_text['hscode'], 'unknown HS code'),
+        'entry_number': (bad_entry_number, 'must be an integer'),
+        'entry_status': (not_text['entry_status'], 'must be a string'),
+        'discharge_port': (not_text['discharge_port'], 'must be a string'),
+        'quantity': (bad_quantity | (df['quantity'] < 0).fillna(False), 'must be a non-negative integer'),
+        'product_id': (bad_product_id | (df['product_id'].notna() & ~df['product_id'].isin(known_products)), 'unknown product'),
+    }
+    errors = {index: {'declaration': 'must be a JSON object'} for index in is_object.index[~is_object]}
+    for field, (mask, message) in checks.items():
+        for index in mask.index[mask & is_object]:
+            errors.setdefault(index, {})[field] = message
+
+    valid = df.drop(index=list(errors))
+    imports = _none_for_nan(pd.DataFrame({
+        'reg_date': valid['reg_date'],
+        'entry_number': valid['entry_number'],
+        'entry_status': valid['entry_status'].astype('string'),
+        'quantity': valid['quantity'],
+        'discharge_port': valid['discharge_port'].astype('string'),
+        'origin_id': valid['origin_id'].astype('Int64'),
+        'destination_id': valid['destination_id'].astype('Int64'),
+        'hscode_id': valid['hscode_id'].astype('Int64'),
+        'product_id': valid['product_id'],
+    }))
+    _write_batches(ImportTable, imports.to_dict('records'), batch_size)
+    refresh_import_rollup(set(zip(valid['reg_date'].dt.year, valid['reg_date'].dt.month)))
+
+    elapsed = time.perf_counter() - started
+    return {
+        'rows_read': len(records),
+        'imports_written': len(imports),
+        'rows_rejected': len(errors),
+        'errors': [{'index': int(index), 'errors': errors[index]} for index in sorted(errors)],
+        'seconds': elapsed,
+        'rows_per_second': len(records) / elapsed if elapsed else 0.0,
+    }
+
+
+def format_report(report):
+    lines = [
+        f"Read {report['rows_read']} rows in {report['seconds']:.2f}s ({report['rows_per_second']:.0f} rows/sec)",
+        f"Wrote {report['exports_written']} exports and {report['products_inserted']} new products",
+    ]
+    for reason, count in report['rejected'].items():
+        examples = ', '.join(report['rejected_examples'].get(reason, []))
+        lines.append(f"Rejected {count} rows: {reason} ({examples})" if examples else f"Rejected {count} rows: {reason}")
+    return '\n'.join(lines)
+
+
+def file_hash(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as source:
+        for block in iter(lambda: source.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def import_exports_file(path, force=False, batch_size=BATCH_SIZE):
+    """Upsert a customs export file, skipping files whose content was already loaded.
+
+    Returns the load report, or None when the file is already in the manifest.
+    """
+    content_hash = file_hash(path)
+    manifest = LoadManifest.query.filter_by(content_hash=content_hash).first()
+    if manifest and not force:
+        return None
+
+    report = load_exports(read_exports_file(path), batch_size=batch_size, upsert=True)
+
+    if manifest is None:
+        manifest = LoadManifest(content_hash=content_hash)
+        db.session.add(manifest)
+    manifest.filename = os.path.basename(path)
+    manifest.rows_read = report['rows_read']
+    manifest.rows_written = report['exports_written']
+    manifest.rows_rejected = sum(report['rejected'].values())
+    manifest.loaded_at = datetime.utcnow()
+    db.session.commit()
+    return report
@@ -0,0 +1,84 @@
+import logging
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from flask import current_app
+from models import db, ImportJob
+
+logger = logging.getLogger(__name__)
+
+# Per-row errors kept on the job; rows_rejected has the full count
+MAX_JOB_ERRORS = 1000
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=current_app.config['IMPORT_WORKERS'], thread_name_prefix='import-job')
+    return _executor
+
+
+def create_import_job(records):
+    job = ImportJob(id=uuid.uuid4().hex, status='queued', rows_received=len(records))
+    db.session.add(job)
+    db.session.commit()
+    return job.id
+
+
+def run_import_job(job_id, records):
+    from importer import load_import_declarations
+
+    job = db.session.get(ImportJob, job_id)
+    job.status = 'running'
+    db.session.commit()
+
+    try:
+        report = load_import_declarations(records, batch_size=current_app.config['IMPORT_BATCH_SIZE'])
+    except Exception as error:
+        logger.exception('Import job %s failed', job_id)
+        db.session.rollback()
+        job = db.session.get(ImportJob, job_id)
+        job.status = 'failed'
+        # Chunks committed before the failure stay written
+        job.message = str(error)
+    else:
+        job = db.session.get(ImportJob, job_id)
+        job.status = 'done'
+        job.rows_written = report['imports_written']
+        job.rows_rejected = report['rows_rejected']
+        job.errors = report['errors'][:MAX_JOB_ERRORS]
+    job.finished_at = datetime.utcnow()
+    db.session.commit()
+    return job
+
+
+def _run_in_background(app, job_id, records):
+    with app.app_context():
+        run_import_job(job_id, records)
+
+
+def submit_import_job(job_id, records):
+    """Run the job on the worker pool; its status is read back from import_jobs.
+
+    Jobs live in this process only: one still queued when the worker exits stays 'queued'.
+    """
+    executor().submit(_run_in_background, current_app._get_current_object(), job_id, records)
+
+
+def import_job_to_dict(job):
+    return {
+        'id': job.id,
+        'status': job.status,
+        'rows_received': job.rows_received,
+        'rows_written': job.rows_written,
+        'rows_rejected': job.rows_rejected,
+        'errors': job.errors or [],
+        'message': job.message,
+        'created_at': job.created_at.isoformat() if job.created_at else None,
+        'finished_at': job.finished_at.isoformat() if job.finished_at else None,
+    }
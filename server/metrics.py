@@ -0,0 +1,131 @@
+import logging
+import threading
+import time
+from collections import defaultdict
+from flask import g, has_request_context, request
+from sqlalchemy import event
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 500)
+SIZE_BUCKETS = (256, 1024, 10240, 102400, 1048576, 10485760)
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0
+        self.count = 0
+
+    def observe(self, value):
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[index] += 1
+                break
+        self.sum += value
+        self.count += 1
+
+    def lines(self, name, labels):
+        cumulative = 0
+        for bound, count in zip(self.buckets, self.counts):
+            cumulative += count
+            yield f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}'
+        yield f'{name}_bucket{{{labels},le="+Inf"}} {self.count}'
+        yield f'{name}_sum{{{labels}}} {self.sum}'
+        yield f'{name}_count{{{labels}}} {self.count}'
+
+
+class RequestMetrics:
+    """Per-endpoint latency, SQL statement count, DB time and response size.
+
+    Numbers are per worker process, like MemoryBackend; Prometheus sums them
+    across workers when each one is scraped.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latency = defaultdict(lambda: Histogram(LATENCY_BUCKETS))
+        self.queries = defaultdict(lambda: Histogram(QUERY_BUCKETS))
+        self.db_seconds = defaultdict(float)
+        self.response_size = defaultdict(lambda: Histogram(SIZE_BUCKETS))
+        self.headers = False
+        self.query_warn_threshold = 50
+
+    def init_app(self, app, db):
+        app.config.setdefault('METRICS_HEADERS', False)
+        app.config.setdefault('METRICS_QUERY_WARN_THRESHOLD', 50)
+        self.headers = app.config['METRICS_HEADERS']
+        self.query_warn_threshold = app.config['METRICS_QUERY_WARN_THRESHOLD']
+
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+        with app.app_context():
+            for engine in db.engines.values():
+                event.listen(engine, 'before_cursor_execute', self._before_cursor_execute)
+                event.listen(engine, 'after_cursor_execute', self._after_cursor_execute)
+        app.extensions['metrics'] = self
+
+    def _before_request(self):
+        g.metrics_start = time.perf_counter()
+        g.query_count = 0
+        g.db_seconds = 0.0
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        if has_request_context():
+            conn.info.setdefault('query_start', []).append(time.perf_counter())
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        if has_request_context() and conn.info.get('query_start'):
+            g.db_seconds = g.get('db_seconds', 0.0) + time.perf_counter() - conn.info['query_start'].pop()
+            g.query_count = g.get('query_count', 0) + 1
+
+    def _after_request(self, response):
+        if 'metrics_start' not in g:
+            return response
+        # Streamed bodies are still being generated here; their time and queries are not counted
+        elapsed = time.perf_counter() - g.metrics_start
+        endpoint = request.endpoint or 'unmatched'
+        labels = (endpoint, request.method, response.status_code)
+
+        with self._lock:
+            self.latency[labels].observe(elapsed)
+            self.queries[labels].observe(g.query_count)
+            self.db_seconds[labels] += g.db_seconds
+            if response.content_length is not None:
+                self.response_size[labels].observe(response.content_length)
+
+        if g.query_count > self.query_warn_threshold:
+            logger.warning('%s %s ran %d SQL statements (threshold %d), possible N+1',
+                           request.method, request.path, g.query_count, self.query_warn_threshold)
+        if self.headers:
+            response.headers['X-Query-Count'] = str(g.query_count)
+            response.headers['Server-Timing'] = (
+                f'db;dur={g.db_seconds * 1000:.1f};desc="{g.query_count} queries", app;dur={elapsed * 1000:.1f}'
+            )
+        return response
+
+    def render(self):
+        """The collected metrics in the Prometheus text exposition format."""
+        lines = []
+        families = [
+            ('http_request_duration_seconds', 'histogram', 'Request latency', self.latency),
+            ('http_request_sql_queries', 'histogram', 'SQL statements per request', self.queries),
+            ('http_request_db_seconds_total', 'counter', 'Time spent in SQL statements', self.db_seconds),
+            ('http_response_size_bytes', 'histogram', 'Response body size', self.response_size),
+        ]
+        with self._lock:
+            for name, kind, help_text, series in families:
+                lines.append(f'# HELP {name} {help_text}')
+                lines.append(f'# TYPE {name} {kind}')
+                for (endpoint, method, status), value in sorted(series.items()):
+                    labels = f'endpoint="{endpoint}",method="{method}",status="{status}"'
+                    if kind == 'counter':
+                        lines.append(f'{name}{{{labels}}} {value}')
+                    else:
+                        lines.extend(value.lines(name, labels))
+        return '\n'.join(lines) + '\n'
+
+
+request_metrics = RequestMetrics()
@@ -1,15 +1,50 @@
+from functools import lru_cache
+from flask import current_app
 from flask_sqlalchemy import SQLAlchemy
-from sqlalchemy import MetaData, ForeignKey
-from sqlalchemy.orm import relationship
+from flask_sqlalchemy.session import Session
+from sqlalchemy import MetaData, ForeignKey, and_, or_, select
+from sqlalchemy.sql.dml import UpdateBase
+from sqlalchemy.orm import relationship, validates
 from datetime import datetime
 from flask_login import UserMixin
 from werkzeug.security import generate_password_hash, check_password_hash
+from cache import user_cache
+from hscodes import hs_levels, hs_prefix_range
 
 metadata = MetaData(naming_convention={
     "fk": "fk_%(table_name)s_%(column_0_name)s_%(referred_table_name)s",
 })
 
-db = SQLAlchemy(metadata=metadata)
+
+class RoutingSession(Session):
+    """Reads go to the 'replica' bind while session.info['read_replica'] is set (see replica.py).
+
+    Flushes and INSERT/UPDATE/DELETE statements always use the primary, and
+    the session stays on the primary for its remaining reads once it has written.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and self.info.get('read_replica'):
+            if self._flushing or isinstance(clause, UpdateBase):
+                self.info['read_replica'] = False
+            elif 'replica' in self._db.engines:
+                return self._db.engines['replica']
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+db = SQLAlchemy(metadata=metadata, session_options={'class_': RoutingSession})
+
+DEFAULT_PASSWORD_HASH_METHOD = 'scrypt:32768:8:1'
+
+
+@lru_cache(maxsize=None)
+def canonical_hash_method(method):
+    # werkzeug fills in default parameters, e.g. 'pbkdf2' -> 'pbkdf2:sha256:600000'
+    return generate_password_hash('', method=method).split('$', 1)[0]
+
+
+def password_hash_method():
+    return current_app.config.get('PASSWORD_HASH_METHOD', DEFAULT_PASSWORD_HASH_METHOD)
 
 class User(UserMixin, db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -17,11 +52,16 @@ class User(UserMixin, db.Model):
     password_hash = db.Column(db.String(128), nullable=False)
 
     def set_password(self, password):
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = generate_password_hash(password, method=password_hash_method())
+        if self.id is not None:
+            user_cache.delete(str(self.id))
 
     def check_password(self, password):
         return check_password_hash(self.password_hash, password)
 
+    def needs_rehash(self):
+        return self.password_hash.split('$', 1)[0] != canonical_hash_method(password_hash_method())
+
 class Country(db.Model):
     __tablename__ = 'countries'
     
@@ -32,12 +72,39 @@ class Country(db.Model):
     def __repr__(self):
         return f'<Country: Id: {self.id}, Name: {self.name} Code: {self.code}>'
 
+def hs_level_default(level):
+    # Core inserts (seed, benchmarks) only pass code; fill the hierarchy columns from it
+    return lambda context: hs_levels(context.get_current_parameters().get('code'))[level]
+
 class HsCode(db.Model):
     __tablename__ = 'hscodes'
+    __table_args__ = (
+        db.Index('ix_hscodes_digits', 'digits'),
+        db.Index('ix_hscodes_chapter', 'chapter'),
+        db.Index('ix_hscodes_heading', 'heading'),
+        db.Index('ix_hscodes_subheading', 'subheading'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     code = db.Column(db.String, unique=True, nullable=False)
     description = db.Column(db.String, nullable=False)
+    # The hierarchy, derived from code: digits-only code plus its 2, 4 and 6 digit prefixes
+    digits = db.Column(db.String, default=hs_level_default('digits'))
+    chapter = db.Column(db.String(2), default=hs_level_default('chapter'))
+    heading = db.Column(db.String(4), default=hs_level_default('heading'))
+    subheading = db.Column(db.String(6), default=hs_level_default('subheading'))
+
+    @validates('code')
+    def validate_code(self, key, code):
+        for level, value in hs_levels(code).items():
+            setattr(self, level, value)
+        return code
+
+    @classmethod
+    def ids_with_prefix(cls, prefixes):
+        """select() of the ids of codes under any of the prefixes (chapter, heading, ...), as range scans on digits."""
+        ranges = [and_(cls.digits >= low, cls.digits < high) for low, high in map(hs_prefix_range, prefixes)]
+        return select(cls.id).where(or_(*ranges))
 
     def __repr__(self):
         return f'<HsCode: Id: {self.id}, Code: {self.code} Description: {self.description}>'
@@ -56,6 +123,14 @@ class Product(db.Model):
 
 class ExportTable(db.Model):
     __tablename__ = 'exporttables'
+    __table_args__ = (
+        db.Index('ix_exporttables_destination_id_export_date', 'destination_id', 'export_date'),
+        db.Index('ix_exporttables_hscode_id_export_date', 'hscode_id', 'export_date'),
+        db.Index('ix_exporttables_product_id', 'product_id'),
+        db.Index('ix_exporttables_export_date', 'export_date'),
+        # Natural key of a customs line, used by the incremental importer's upserts
+        db.Index('uq_exporttables_natural_key', 'export_date', 'destination_id', 'hscode_id', 'product_id', 'unit', unique=True),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     fob_value = db.Column(db.Integer)
@@ -73,8 +148,37 @@ class ExportTable(db.Model):
     def __repr__(self):
         return f'<ExportTable: Id: {self.id}, FOB Value: {self.fob_value} Quantity: {self.quantity} Unit: {self.unit} Export Date: {self.export_date} Destination: {self.destination.name} HS Code: {self.hscode.code}>'
 
+class ExportMonthlyRollup(db.Model):
+    __tablename__ = 'export_monthly_rollup'
+    __table_args__ = (
+        db.Index('ix_export_monthly_rollup_year_month', 'year', 'month'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    year = db.Column(db.Integer, nullable=False)
+    month = db.Column(db.Integer, nullable=False)
+    destination_id = db.Column(db.Integer, ForeignKey('countries.id'))
+    hscode_id = db.Column(db.Integer, ForeignKey('hscodes.id'))
+    product_id = db.Column(db.Integer, ForeignKey('products.id'))
+    fob_sum = db.Column(db.Float)
+    qty_sum = db.Column(db.Float)
+    # Non-null counts, so averages match AVG() over the fact table
+    fob_count = db.Column(db.Integer, nullable=False)
+    qty_count = db.Column(db.Integer, nullable=False)
+    row_count = db.Column(db.Integer, nullable=False)
+
+    def __repr__(self):
+        return f'<ExportMonthlyRollup: {self.year}-{self.month:02d} Destination: {self.destination_id} HS Code: {self.hscode_id} Product: {self.product_id} FOB Sum: {self.fob_sum} Rows: {self.row_count}>'
+
 class ImportTable(db.Model):
     __tablename__ = 'importtables'
+    __table_args__ = (
+        db.Index('ix_importtables_origin_id_reg_date', 'origin_id', 'reg_date'),
+        db.Index('ix_importtables_destination_id_reg_date', 'destination_id', 'reg_date'),
+        db.Index('ix_importtables_hscode_id_reg_date', 'hscode_id', 'reg_date'),
+        db.Index('ix_importtables_product_id', 'product_id'),
+        db.Index('ix_importtables_reg_date', 'reg_date'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     reg_date = db.Column(db.DateTime, default=datetime.utcnow)
@@ -95,6 +199,26 @@ class ImportTable(db.Model):
     def __repr__(self):
         return f'<ImportTable: Id: {self.id}, Reg Date: {self.reg_date} Entry Number: {self.entry_number} Entry Status: {self.entry_status} Quantity: {self.quantity} Discharge Port: {self.discharge_port} Origin: {self.origin.name} Destination: {self.destination.name} Product: {self.product.name} HS Code: {self.hscode.code}>'
 
+class ImportMonthlyRollup(db.Model):
+    __tablename__ = 'import_monthly_rollup'
+    __table_args__ = (
+        db.Index('ix_import_monthly_rollup_year_month', 'year', 'month'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    year = db.Column(db.Integer, nullable=False)
+    month = db.Column(db.Integer, nullable=False)
+    origin_id = db.Column(db.Integer, ForeignKey('countries.id'))
+    destination_id = db.Column(db.Integer, ForeignKey('countries.id'))
+    hscode_id = db.Column(db.Integer, ForeignKey('hscodes.id'))
+    product_id = db.Column(db.Integer, ForeignKey('products.id'))
+    qty_sum = db.Column(db.Float)
+    qty_count = db.Column(db.Integer, nullable=False)
+    row_count = db.Column(db.Integer, nullable=False)
+
+    def __repr__(self):
+        return f'<ImportMonthlyRollup: {self.year}-{self.month:02d} Origin: {self.origin_id} Destination: {self.destination_id} HS Code: {self.hscode_id} Product: {self.product_id} Quantity Sum: {self.qty_sum} Rows: {self.row_count}>'
+
 class TaxTable(db.Model):
     __tablename__ = 'taxtables'
     
@@ -105,6 +229,41 @@ class TaxTable(db.Model):
     export_rate = db.Column(db.Integer)
     import_declaration_fee = db.Column(db.Integer)
     railway_development_levy = db.Column(db.Integer)
+    # Rates for one HS code; the row without an HS code holds the default rates
+    hscode_id = db.Column(db.Integer, ForeignKey('hscodes.id'), unique=True)
+
+    hscode = relationship('HsCode', backref=db.backref('tax_rates', lazy=True))
+
+    def __repr__(self):
+        return f'<TaxTable: Id: {self.id}, Import Duty: {self.import_duty} Excise Duty: {self.excise_duty} Export Duty: {self.export_duty} Export Rate: {self.export_rate} Import Declaration Fee: {self.import_declaration_fee} Railway Development Levy: {self.railway_development_levy} HS Code Id: {self.hscode_id}>'
+
+class LoadManifest(db.Model):
+    __tablename__ = 'load_manifests'
+
+    id = db.Column(db.Integer, primary_key=True)
+    filename = db.Column(db.String, nullable=False)
+    content_hash = db.Column(db.String(64), unique=True, nullable=False)
+    rows_read = db.Column(db.Integer)
+    rows_written = db.Column(db.Integer)
+    rows_rejected = db.Column(db.Integer)
+    loaded_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<LoadManifest: Id: {self.id}, Filename: {self.filename} Hash: {self.content_hash} Rows Written: {self.rows_written} Loaded At: {self.loaded_at}>'
+
+class ImportJob(db.Model):
+    __tablename__ = 'import_jobs'
+
+    id = db.Column(db.String(32), primary_key=True)
+    # queued -> running -> done | failed
+    status = db.Column(db.String(16), nullable=False, default='queued')
+    rows_received = db.Column(db.Integer, nullable=False)
+    rows_written = db.Column(db.Integer)
+    rows_rejected = db.Column(db.Integer)
+    errors = db.Column(db.JSON)
+    message = db.Column(db.String)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    finished_at = db.Column(db.DateTime)
 
     def __repr__(self):
-        return f'<TaxTable: Id: {self.id}, Import Duty: {self.import_duty} Excise Duty: {self.excise_duty} Export Duty: {self.export_duty} Export Rate: {self.export_rate} Import Declaration Fee: {self.import_declaration_fee} Railway Development Levy: {self.railway_development_levy}>'
+        return f'<ImportJob: Id: {self.id}, Status: {self.status} Rows Received: {self.rows_received} Rows Written: {self.rows_written}>'
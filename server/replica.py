@@ -0,0 +1,162 @@
+import fcntl
+import logging
+import os
+import sqlite3
+import threading
+import time
+from flask import current_app, request
+from sqlalchemy import text
+from sqlalchemy.engine import make_url
+from cache import reference_cache
+
+logger = logging.getLogger(__name__)
+
+# Seconds between lag probes of an external PostgreSQL replica
+LAG_CHECK_INTERVAL = 1
+
+POSTGRES_LAG_SQL = text(
+    'SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 '
+    'ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()) END'
+)
+
+
+class ReadReplica:
+    """Routes the GETs of resources with conditional_tables to a read-only copy.
+
+    The copy is either READ_REPLICA_URL (a streaming replica) or, with
+    READ_SNAPSHOT on a SQLite primary, a file refreshed through SQLite's
+    backup API. A request only uses it while the copy is at most
+    REPLICA_MAX_LAG seconds behind and none of the tables the resource reads
+    has been invalidated since the copy was taken; otherwise it reads the
+    primary and a stale snapshot is refreshed in the background. Writes
+    always go to the primary (see RoutingSession).
+    """
+
+    def __init__(self):
+        self.mode = None
+        self.max_lag = 5
+        self.snapshot_path = None
+        self._db = None
+        self._app = None
+        self._refreshing = threading.Lock()
+        self._lag_lock = threading.Lock()
+        self._lag = (0.0, None)
+
+    def init_app(self, app, db):
+        """Call before db.init_app: the replica is registered as the 'replica' bind."""
+        app.config.setdefault('READ_REPLICA_URL', None)
+        app.config.setdefault('READ_SNAPSHOT', False)
+        app.config.setdefault('READ_SNAPSHOT_PATH', None)
+        app.config.setdefault('REPLICA_MAX_LAG', 5)
+        self.max_lag = app.config['REPLICA_MAX_LAG']
+        self._db = db
+        self._app = app
+
+        if app.config['READ_REPLICA_URL']:
+            self.mode = 'replica'
+            url = app.config['READ_REPLICA_URL']
+        elif app.config['READ_SNAPSHOT']:
+            if make_url(app.config['SQLALCHEMY_DATABASE_URI']).get_backend_name() != 'sqlite':
+                raise ValueError('READ_SNAPSHOT needs a SQLite primary; use READ_REPLICA_URL for other databases')
+            self.mode = 'snapshot'
+            self.snapshot_path = app.config['READ_SNAPSHOT_PATH'] or os.path.join(app.instance_path, 'read-snapshot.db')
+            url = f'sqlite:///{self.snapshot_path}'
+        else:
+            return
+        binds = dict(app.config.get('SQLALCHEMY_BINDS') or {})
+        binds['replica'] = url
+        app.config['SQLALCHEMY_BINDS'] = binds
+        app.before_request(self._before_request)
+        app.extensions['read_replica'] = self
+
+    def _before_request(self):
+        if request.method not in ('GET', 'HEAD'):
+            return
+        view = current_app.view_functions.get(request.endpoint)
+        tables = getattr(getattr(view, 'view_class', None), 'conditional_tables', None)
+        if tables and self.fresh_for(tables):
+            self._db.session.info['read_replica'] = True
+
+    def as_of(self):
+        """Unix time the replica's data is current to, or None when it cannot be used."""
+        if self.mode == 'snapshot':
+            try:
+                return os.path.getmtime(self._marker_path())
+            except OSError:
+                return None
+        lag = self.lag()
+        return None if lag is None else time.time() - lag
+
+    def fresh_for(self, tables):
+        as_of = self.as_of()
+        if as_of is None or time.time() - as_of > self.max_lag:
+            if self.mode == 'snapshot':
+                self.refresh_in_background()
+            return False
+        # changed_at has whole seconds: a write in the snapshot's own second counts as newer
+        return max(reference_cache.changed_at(table) for table in tables) < int(as_of)
+
+    def lag(self):
+        """Seconds a PostgreSQL replica is behind, probed at most once per LAG_CHECK_INTERVAL; 0 for other databases."""
+        engine = self._db.engines['replica']
+        if engine.dialect.name != 'postgresql':
+            return 0
+        checked, lag = self._lag
+        if time.monotonic() - checked < LAG_CHECK_INTERVAL:
+            return lag
+        with self._lag_lock:
+            try:
+                with engine.connect() as conn:
+                    value = conn.execute(POSTGRES_LAG_SQL).scalar()
+                lag = float(value) if value is not None else None
+            except Exception:
+                logger.exception('Replica lag check failed; reading from the primary')
+                lag = None
+            self._lag = (time.monotonic(), lag)
+        return lag
+
+    def _marker_path(self):
+        return self.snapshot_path + '.refreshed'
+
+    def refresh(self):
+        """Copy the primary into the snapshot file; its marker's mtime is when the copy started."""
+        lock_file = open(self.snapshot_path + '.lock', 'w')
+        try:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                return False  # another worker is refreshing it
+            started = time.time()
+            source = sqlite3.connect(self._db.engines[None].url.database)
+            target = sqlite3.connect(self.snapshot_path)
+            try:
+                # One step: a consistent copy of the primary as of `started`
+                source.backup(target)
+            finally:
+                target.close()
+                source.close()
+            with open(self._marker_path(), 'w'):
+                pass
+            os.utime(self._marker_path(), (started, started))
+            return True
+        finally:
+            lock_file.close()
+
+    def refresh_in_background(self):
+        if not self._refreshing.acquire(blocking=False):
+            return
+        app = self._app
+
+        def run():
+            try:
+                with app.app_context():
+                    self.refresh()
+            except Exception:
+                logger.exception('Refreshing the read snapshot failed')
+            finally:
+                self._refreshing.release()
+
+        threading.Thread(target=run, name='read-snapshot', daemon=True).start()
+
+
+read_replica = ReadReplica()
@@ -0,0 +1,184 @@
+import csv
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from flask import current_app
+from sqlalchemy import create_engine, event, extract, func, or_, select
+from sqlalchemy.engine import make_url
+from sqlalchemy.orm import aliased
+from models import db, Country, HsCode, ExportTable, ImportTable
+from rollups import next_month
+
+PARTITION_KINDS = ('month', 'chapter')
+
+# file name -> (key columns, measure columns)
+REPORTS = {
+    'exports_by_destination': (['month', 'destination', 'country_name'], ['fob_value', 'quantity', 'shipments']),
+    'exports_by_hscode': (['month', 'hscode', 'hscode_description'], ['fob_value', 'quantity', 'shipments']),
+    'imports_by_origin': (['month', 'origin', 'country_name'], ['quantity', 'entries']),
+    'imports_by_hscode': (['month', 'hscode', 'hscode_description'], ['quantity', 'entries']),
+}
+
+# Set per worker process by _init_worker
+_engine = None
+
+
+def read_only_engine(url):
+    """An engine that cannot write: SQLite opened with mode=ro, PostgreSQL in read-only transactions."""
+    url = make_url(url)
+    if url.get_backend_name() == 'sqlite':
+        engine = create_engine(f'sqlite:///file:{url.database}?mode=ro&uri=true')
+
+        @event.listens_for(engine, 'connect')
+        def query_only(dbapi_connection, connection_record):
+            dbapi_connection.execute('PRAGMA query_only=ON')
+        return engine
+    if url.get_backend_name() == 'postgresql':
+        return create_engine(url, connect_args={'options': '-c default_transaction_read_only=on'})
+    return create_engine(url)
+
+
+def _init_worker(url):
+    global _engine
+    _engine = read_only_engine(url)
+
+
+def _partition_filters(year, partition):
+    kind, value = partition
+    start = datetime(year, 1, 1)
+    end = datetime(year + 1, 1, 1)
+    if kind == 'month':
+        start = datetime(year, value, 1)
+        end = next_month(start)
+    if kind == 'chapter':
+        chapter_ids = select(HsCode.id).where(HsCode.chapter == value)
+        return start, end, lambda fact: fact.hscode_id.in_(chapter_ids)
+    if kind == 'unclassified':
+        unclassified_ids = select(HsCode.id).where(HsCode.chapter.is_(None))
+        return start, end, lambda fact: or_(fact.hscode_id.is_(None), fact.hscode_id.in_(unclassified_ids))
+    return start, end, None
+
+
+def _summaries(year, partition):
+    start, end, hscode_filter = _partition_filters(year, partition)
+    origin = aliased(Country)
+
+    def grouped(fact, date_column, dimension, columns, measures, join):
+        month = extract('month', date_column)
+        stmt = select(month, *columns, *measures).select_from(fact).outerjoin(*join) \
+            .where(date_column >= start, date_column < end) \
+            .group_by(month, dimension, *columns)
+        if hscode_filter is not None:
+            stmt = stmt.where(hscode_filter(fact))
+        return stmt
+
+    export_measures = [func.sum(ExportTable.fob_value), func.sum(ExportTable.quantity), func.count()]
+    import_measures = [func.sum(ImportTable.quantity), func.count()]
+    return {
+        'exports_by_destination': grouped(ExportTable, ExportTable.export_date, ExportTable.destination_id,
+                                          [Country.code, Country.name], export_measures,
+                                          (Country, ExportTable.destination_id == Country.id)),
+        'exports_by_hscode': grouped(ExportTable, ExportTable.export_date, ExportTable.hscode_id,
+                                     [HsCode.code, HsCode.description], export_measures,
+                                     (HsCode, ExportTable.hscode_id == HsCode.id)),
+        'imports_by_origin': grouped(ImportTable, ImportTable.reg_date, ImportTable.origin_id,
+                                     [origin.code, origin.name], import_measures,
+                                     (origin, ImportTable.origin_id == origin.id)),
+        'imports_by_hscode': grouped(ImportTable, ImportTable.reg_date, ImportTable.hscode_id,
+                                     [HsCode.code, HsCode.description], import_measures,
+                                     (HsCode, ImportTable.hscode_id == HsCode.id)),
+    }
+
+
+def build_partition(year, partition):
+    """Every report's rows for one partition, as plain tuples (they are pickled back to the parent)."""
+    with _engine.connect() as conn:
+        return {name: [tuple(row) for row in conn.execute(stmt)] for name, stmt in _summaries(year, partition).items()}
+
+
+def report_partitions(year, kind):
+    if kind == 'month':
+        return [('month', month) for month in range(1, 13)]
+    chapters = db.session.execute(select(HsCode.chapter).where(HsCode.chapter.isnot(None)).distinct().order_by(HsCode.chapter)).scalars()
+    # Rows without an HS code (or with one shorter than a chapter) go in their own partition
+    return [('chapter', chapter) for chapter in chapters] + [('unclassified', None)]
+
+
+def _merge(year, results):
+    # Chapter partitions can each hold part of a (month, destination) total; sum them back together
+    merged = {}
+    for name, (keys, measures) in REPORTS.items():
+        totals = {}
+        for result in results:
+            for row in result[name]:
+                key = (f'{year}-{int(row[0]):02d}', *row[1:len(keys)])
+                values = row[len(keys):]
+                current = totals.get(key)
+                totals[key] = values if current is None else tuple((a or 0) + (b or 0) for a, b in zip(current, values))
+        merged[name] = sorted(totals.items(), key=lambda item: tuple('' if part is None else str(part) for part in item[0]))
+    return merged
+
+
+def _run(year, partitions, url, workers):
+    if workers == 1:
+        _init_worker(url)
+        return [build_partition(year, partition) for partition in partitions]
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(url,)) as pool:
+        return list(pool.map(build_partition, [year] * len(partitions), partitions))
+
+
+def reports_dir(year):
+    return os.path.join(current_app.instance_path, 'reports', str(year))
+
+
+def write_reports(merged, output):
+    os.makedirs(output, exist_ok=True)
+    rows = {}
+    for name, (keys, measures) in REPORTS.items():
+        with open(os.path.join(output, f'{name}.csv'), 'w', newline='') as report_file:
+            writer = csv.writer(report_file)
+            writer.writerow(keys + measures)
+            for key, values in merged[name]:
+                # Float sums depend on the order rows were added in; cents are what the report means
+                writer.writerow(list(key) + [round(value, 2) if isinstance(value, float) else value for value in values])
+        rows[name] = len(merged[name])
+    return rows
+
+
+def build_reports(year, kind='month', workers=None, output=None, compare=False):
+    """Build the year's trade reports over a process pool and write them as CSV files.
+
+    With compare=True the same partitions are also computed in this process,
+    and the timings of both runs go into report.json.
+    """
+    url = db.engine.url.render_as_string(hide_password=False)
+    workers = workers or os.cpu_count() or 1
+    output = output or reports_dir(year)
+    partitions = report_partitions(year, kind)
+    # Forked workers must not share this process's pooled connections
+    db.engine.dispose()
+
+    started = time.perf_counter()
+    results = _run(year, partitions, url, workers)
+    seconds = time.perf_counter() - started
+
+    summary = {
+        'year': year,
+        'partition': kind,
+        'partitions': len(partitions),
+        'workers': workers,
+        'seconds': round(seconds, 3),
+    }
+    if compare:
+        started = time.perf_counter()
+        _run(year, partitions, url, 1)
+        summary['single_process_seconds'] = round(time.perf_counter() - started, 3)
+        summary['speedup'] = round(summary['single_process_seconds'] / seconds, 2) if seconds else None
+
+    summary['rows'] = write_reports(_merge(year, results), output)
+    summary['output'] = output
+    with open(os.path.join(output, 'report.json'), 'w') as summary_file:
+        json.dump(summary, summary_file, indent=2)
+    return summary
@@ -1,17 +1,40 @@
-from flask import Flask, jsonify, request, abort
+import json
+from datetime import datetime
+from flask import current_app, jsonify, request, abort, send_file, url_for
 from flask_restful import Resource
 from flask_login import LoginManager, login_user, logout_user, login_required
-from models import db, Country, HsCode, Product, ExportTable, ImportTable, TaxTable, User
+from sqlalchemy import select, func, extract, tuple_
+from sqlalchemy.orm import make_transient_to_detached
+from models import db, Country, HsCode, Product, ExportTable, ImportTable, TaxTable, User, ExportMonthlyRollup, ImportJob
+from rollups import next_month
+from snapshots import SNAPSHOT_FORMATS, SNAPSHOT_TABLES, load_manifest, partition_path
+from streaming import NDJSON_MIMETYPE, requested_stream_format, stream_response
+from cache import reference_cache, user_cache
+from query_params import ListQuery
+from timeseries import GRANULARITIES, LOOKBACK_MONTHS, dense_series
+from dimensions import DIMENSION_TABLES, dimensions
+from hscodes import HS_LEVELS, normalize_hs_code
+from search import SEARCH_LIMIT, SEARCH_MAX_LIMIT, search_index
+from jobs import create_import_job, run_import_job, submit_import_job, import_job_to_dict
 
-app = Flask(__name__)
 login_manager = LoginManager()
-login_manager.init_app(app)
 login_manager.login_view = 'loginresource'
 
 
 @login_manager.user_loader
 def load_user(user_id):
-    return User.query.get(int(user_id))
+    # Cache the column values, not the instance, so nothing leaks between sessions
+    values = user_cache.get(user_id)
+    if values is None:
+        user = db.session.get(User, int(user_id))
+        if user is not None:
+            user_cache.set(user_id, {'id': user.id, 'username': user.username, 'password_hash': user.password_hash},
+                           ttl=current_app.config['USER_CACHE_TTL'])
+        return user
+
+    user = User(**values)
+    make_transient_to_detached(user)
+    return db.session.merge(user, load=False)
 
 
 class LoginResource(Resource):
@@ -22,6 +45,10 @@ class LoginResource(Resource):
 
         user = User.query.filter_by(username=data['username']).first()
         if user and user.check_password(data['password']):
+            # Upgrade hashes made with an older PASSWORD_HASH_METHOD while we have the plain password
+            if user.needs_rehash():
+                user.set_password(data['password'])
+                db.session.commit()
             login_user(user)
             return {'message': 'Logged in successfully'}, 200
         else:
@@ -35,11 +62,64 @@ class LogoutResource(Resource):
         return {'message': 'Logged out successfully'}, 200
 
 
+COUNTRY_QUERY = ListQuery(Country, ['id', 'name', 'code'])
+HSCODE_QUERY = ListQuery(HsCode, ['id', 'code', 'description', 'chapter', 'heading', 'subheading'])
+PRODUCT_QUERY = ListQuery(Product, ['id', 'name', 'hs_code_id'])
+
+
+def hs_prefixes(raw):
+    # ?hs_prefix=48,2523.29 -> ['48', '252329']: chapters, headings or any longer prefix
+    prefixes = [normalize_hs_code(value) for value in raw.split(',') if value.strip()]
+    if not prefixes or not all(prefixes):
+        abort(400)
+    return prefixes
+
+
+def hs_prefix_filter(hscode_id):
+    return lambda raw: hscode_id.in_(HsCode.ids_with_prefix(hs_prefixes(raw)))
+
+
+EXPORT_TABLE_QUERY = ListQuery(ExportTable, ['id', 'fob_value', 'quantity', 'unit', 'export_date', 'destination_id', 'hscode_id'],
+                               filters={'hs_prefix': hs_prefix_filter(ExportTable.hscode_id)})
+IMPORT_TABLE_QUERY = ListQuery(ImportTable, ['id', 'reg_date', 'entry_number', 'entry_status', 'quantity', 'discharge_port',
+                                             'origin_id', 'destination_id', 'product_id', 'hscode_id'],
+                               filters={'hs_prefix': hs_prefix_filter(ImportTable.hscode_id)})
+TAX_TABLE_QUERY = ListQuery(TaxTable, ['id', 'import_duty', 'excise_duty', 'export_duty', 'export_rate',
+                                       'import_declaration_fee', 'railway_development_levy', 'hscode_id'])
+
+
+def list_rows(list_query, args=None):
+    params = list_query.parse(args)
+    return [params.to_dict(row) for row in db.session.execute(params.select())]
+
+
+def list_response(list_query):
+    params = list_query.parse()
+    stream_format = requested_stream_format()
+    if stream_format:
+        return stream_response(params.select(), params.to_dict, params.fields, stream_format, scalars=False)
+    return [params.to_dict(row) for row in db.session.execute(params.select())]
+
+
+def load_countries():
+    return list_rows(COUNTRY_QUERY, {})
+
+
+def load_hscodes():
+    return list_rows(HSCODE_QUERY, {})
+
+
+def load_products():
+    return list_rows(PRODUCT_QUERY, {})
+
+
 class CountriesResource(Resource):
     @login_required
     def get(self):
-        countries = Country.query.all()
-        return [{'id': country.id, 'name': country.name, 'code': country.code} for country in countries]
+        # Only the unfiltered list is cached
+        if request.args:
+            return list_rows(COUNTRY_QUERY)
+        return reference_cache.response('countries', load_countries, private=True)
 
     def post(self):
         data = request.get_json()
@@ -49,10 +129,13 @@ class CountriesResource(Resource):
         country = Country(name=data['name'], code=data['code'])
         db.session.add(country)
         db.session.commit()
+        reference_cache.invalidate('countries')
         return {'id': country.id, 'name': country.name, 'code': country.code}, 201
 
 
 class CountryResource(Resource):
+    conditional_tables = ('countries',)
+
     def get(self, id):
         country = Country.query.get_or_404(id)
         return {'id': country.id, 'name': country.name, 'code': country.code}
@@ -67,90 +150,411 @@ class CountryResource(Resource):
             country.code = data['code']
 
         db.session.commit()
+        reference_cache.invalidate('countries')
         return {'id': country.id, 'name': country.name, 'code': country.code}
 
     def delete(self, id):
         country = Country.query.get_or_404(id)
         db.session.delete(country)
         db.session.commit()
+        reference_cache.invalidate('countries')
         return {'result': True}
 
 
 class HsCodesResource(Resource):
+    conditional_tables = ('hscodes',)
+
     def get(self):
-        hscodes = HsCode.query.all()
-        return [{'id': hscode.id, 'code': hscode.code, 'description': hscode.description} for hscode in hscodes]
+        if request.args:
+            return list_rows(HSCODE_QUERY)
+        return reference_cache.response('hscodes', load_hscodes)
 
 
 class ProductsResource(Resource):
+    conditional_tables = ('products',)
+
     def get(self):
-        products = Product.query.all()
-        return [{'id': product.id, 'name': product.name, 'hs_code_id': product.hs_code_id} for product in products]
+        if request.args:
+            return list_rows(PRODUCT_QUERY)
+        return reference_cache.response('products', load_products)
 
 
 class ExportTablesResource(Resource):
+    conditional_tables = ('exporttables',)
+
     def get(self):
-        exports = ExportTable.query.all()
-        return [{
-            'id': export.id,
-            'fob_value': export.fob_value,
-            'quantity': export.quantity,
-            'unit': export.unit,
-            'export_date': export.export_date,
-            'destination_id': export.destination_id,
-            'hscode_id': export.hscode_id
-        } for export in exports]
+        return list_response(EXPORT_TABLE_QUERY)
 
 
 class ImportTablesResource(Resource):
+    conditional_tables = ('importtables',)
+
     def get(self):
-        imports = ImportTable.query.all()
-        return [{
-            'id': imp.id,
-            'reg_date': imp.reg_date,
-            'entry_number': imp.entry_number,
-            'entry_status': imp.entry_status,
-            'quantity': imp.quantity,
-            'discharge_port': imp.discharge_port,
-            'origin_id': imp.origin_id,
-            'destination_id': imp.destination_id,
-            'product_id': imp.product_id,
-            'hscode_id': imp.hscode_id
-        } for imp in imports]
+        return list_response(IMPORT_TABLE_QUERY)
+
+
+def read_declarations():
+    # NDJSON: one declaration per line; a line that is not JSON is kept as None and rejected with its index
+    if request.mimetype == NDJSON_MIMETYPE:
+        records = []
+        for line in request.get_data(as_text=True).splitlines():
+            if line.strip():
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    records.append(None)
+        return records
+
+    data = request.get_json(silent=True)
+    if isinstance(data, dict):
+        data = data.get('declarations')
+    if not isinstance(data, list):
+        abort(400)
+    return data
+
+
+class ImportBatchResource(Resource):
+    def post(self):
+        records = read_declarations()
+        if not records:
+            abort(400)
+
+        job_id = create_import_job(records)
+        location = url_for('importjobresource', job_id=job_id)
+        if len(records) <= current_app.config['IMPORT_SYNC_LIMIT']:
+            return import_job_to_dict(run_import_job(job_id, records)), 201, {'Location': location}
+
+        submit_import_job(job_id, records)
+        return import_job_to_dict(db.session.get(ImportJob, job_id)), 202, {'Location': location}
+
+
+class ImportJobResource(Resource):
+    def get(self, job_id):
+        return import_job_to_dict(db.get_or_404(ImportJob, job_id))
 
 
 class TaxTablesResource(Resource):
+    conditional_tables = ('taxtables',)
+
+    def get(self):
+        return list_response(TAX_TABLE_QUERY)
+
+
+class SearchResource(Resource):
+    conditional_tables = ('products', 'hscodes')
+
     def get(self):
-        taxes = TaxTable.query.all()
-        return [{
-            'id': tax.id,
-            'import_duty': tax.import_duty,
-            'excise_duty': tax.excise_duty,
-            'export_duty': tax.export_duty,
-            'export_rate': tax.export_rate,
-            'import_declaration_fee': tax.import_declaration_fee,
-            'railway_development_levy': tax.railway_development_levy
-        } for tax in taxes]
+        query = request.args.get('q', '').strip()
+        limit = request.args.get('limit', SEARCH_LIMIT, type=int)
+        types = parse_csv_arg('type')
+        if not query or limit < 1 or limit > SEARCH_MAX_LIMIT or set(types) - {'product', 'hscode'}:
+            abort(400)
+        return {'query': query, 'results': search_index().search(query, limit, types)}
+
+
+class TaxQuoteResource(Resource):
+    def post(self):
+        from taxes import quote_items
+
+        data = request.get_json()
+        if not isinstance(data, dict):
+            abort(400)
+
+        # {"items": [...]} quotes a batch; anything else is a single consignment
+        if 'items' in data:
+            if not isinstance(data['items'], list) or not all(isinstance(item, dict) for item in data['items']):
+                abort(400)
+            return {'items': quote_items(data['items'])}
+
+        result = quote_items([data])[0]
+        if 'error' in result:
+            return {'message': result['error']}, 400
+        return result
+
+EXPORTS_PAGE_SIZE = 500
+EXPORTS_MAX_PAGE_SIZE = 5000
+EXPORT_FIELDS = ['id', 'Year', 'Month', 'DESTINATION', 'COUNTRYNAME', 'HS CODE', 'SHORT_DESC', 'QUANTITY', 'UNIT', 'FOB_VALUE']
+
+
+# Only the fact table's own columns are selected; names come from the dimension registry
+EXPORT_COLUMNS = [ExportTable.id, ExportTable.export_date, ExportTable.destination_id, ExportTable.hscode_id,
+                  ExportTable.quantity, ExportTable.unit, ExportTable.fob_value]
+
+
+# Exports are read together with the dimension tables their codes and names come from
+EXPORT_TABLES = ('exporttables',) + DIMENSION_TABLES
+
+
+def export_to_dict(export, dims):
+    return {
+        "id": export.id,
+        "Year": export.export_date.year,
+        "Month": export.export_date.month,
+        "DESTINATION": dims.countries.get('code', export.destination_id),
+        "COUNTRYNAME": dims.countries.get('name', export.destination_id),
+        "HS CODE": dims.hscodes.get('code', export.hscode_id),
+        "SHORT_DESC": dims.hscodes.get('description', export.hscode_id),
+        "QUANTITY": export.quantity,
+        "UNIT": export.unit,
+        "FOB_VALUE": export.fob_value
+    }
+
 
 class ExportResource(Resource):
+    conditional_tables = EXPORT_TABLES
+
+    def get(self, export_id=None):
+        dims = dimensions()
+        query = select(*EXPORT_COLUMNS)
+
+        if export_id is not None:
+            export = db.session.execute(query.where(ExportTable.id == export_id)).first()
+            if export is None:
+                abort(404)
+            return jsonify(export_to_dict(export, dims))
+
+        if 'hs_prefix' in request.args:
+            query = query.where(ExportTable.hscode_id.in_(HsCode.ids_with_prefix(hs_prefixes(request.args['hs_prefix']))))
+
+        # Streaming clients get every row (from after_id on) without paging
+        after_id = request.args.get('after_id', 0, type=int)
+        stream_format = requested_stream_format()
+        if stream_format:
+            stmt = query.where(ExportTable.id > after_id).order_by(ExportTable.id)
+            return stream_response(stmt, lambda export: export_to_dict(export, dims), EXPORT_FIELDS, stream_format, scalars=False)
+
+        limit = request.args.get('limit', EXPORTS_PAGE_SIZE, type=int)
+        if limit < 1 or limit > EXPORTS_MAX_PAGE_SIZE:
+            abort(400)
+
+        # Keyset pagination: seek past the last id seen instead of using OFFSET
+        exports = db.session.execute(query.where(ExportTable.id > after_id).order_by(ExportTable.id).limit(limit)).all()
+        next_cursor = exports[-1].id if len(exports) == limit else None
+
+        return jsonify({
+            'exports': [export_to_dict(export, dims) for export in exports],
+            'next_cursor': next_cursor
+        })
+
+
+AGGREGATE_MEASURES = ['fob_value', 'quantity']
+AGGREGATE_DIMENSIONS = ['year', 'month', 'destination', 'hscode', *HS_LEVELS, 'product']
+
+
+def parse_csv_arg(name, default=''):
+    return [value.strip() for value in request.args.get(name, default).split(',') if value.strip()]
+
+
+def parse_month_arg(name):
+    # Months are given as YYYY-MM and converted to the first day of that month
+    value = request.args.get(name)
+    if not value:
+        return None
+    try:
+        return datetime.strptime(value, '%Y-%m')
+    except ValueError:
+        abort(400)
+
+
+def export_fact_source():
+    return {
+        'year': extract('year', ExportTable.export_date),
+        'month': extract('month', ExportTable.export_date),
+        'destination_id': ExportTable.destination_id,
+        'hscode_id': ExportTable.hscode_id,
+        'product_id': ExportTable.product_id,
+        'count': func.count(),
+        'sum': {'fob_value': func.sum(ExportTable.fob_value), 'quantity': func.sum(ExportTable.quantity)},
+        'avg': {'fob_value': func.avg(ExportTable.fob_value), 'quantity': func.avg(ExportTable.quantity)},
+        'start': lambda month_start: ExportTable.export_date >= month_start,
+        'end': lambda month_start: ExportTable.export_date < next_month(month_start),
+    }
+
+
+def export_rollup_source():
+    rollup = ExportMonthlyRollup
+    return {
+        'year': rollup.year,
+        'month': rollup.month,
+        'destination_id': rollup.destination_id,
+        'hscode_id': rollup.hscode_id,
+        'product_id': rollup.product_id,
+        'count': func.sum(rollup.row_count),
+        'sum': {'fob_value': func.sum(rollup.fob_sum), 'quantity': func.sum(rollup.qty_sum)},
+        'avg': {
+            'fob_value': func.sum(rollup.fob_sum) / func.nullif(func.sum(rollup.fob_count), 0),
+            'quantity': func.sum(rollup.qty_sum) / func.nullif(func.sum(rollup.qty_count), 0),
+        },
+        'start': lambda month_start: tuple_(rollup.year, rollup.month) >= (month_start.year, month_start.month),
+        'end': lambda month_start: tuple_(rollup.year, rollup.month) <= (month_start.year, month_start.month),
+    }
+
+
+class ExportAggregateResource(Resource):
+    conditional_tables = EXPORT_TABLES
+
     def get(self):
-        exports = ExportTable.query.all()
-        result = []
-
-        for export in exports:
-            export_data = {
-                "id": export.id,
-                "Year": export.export_date.year,
-                "Month": export.export_date.month,
-                "DESTINATION": export.destination.code,
-                "COUNTRYNAME": export.destination.name,
-                "HS CODE": export.hscode.code,
-                "SHORT_DESC": export.hscode.description,
-                "QUANTITY": export.quantity,
-                "UNIT": export.unit,
-                "FOB_VALUE": export.fob_value
-            }
-            result.append(export_data)
-        
-        return jsonify(result)
+        group_by = parse_csv_arg('group_by')
+        metrics = parse_csv_arg('metrics', 'sum:fob_value,count')
+        # Repeats would select the same label twice; with no metrics and no group_by there is nothing to select
+        if any(dimension not in AGGREGATE_DIMENSIONS for dimension in group_by) or len(set(group_by)) != len(group_by) \
+                or not metrics or len(set(metrics)) != len(metrics):
+            abort(400)
+
+        # Every supported filter and dimension is month-grained, so the monthly rollup can answer it
+        use_rollup = current_app.config.get('AGGREGATE_FROM_ROLLUPS', True)
+        source = export_rollup_source() if use_rollup else export_fact_source()
+        fact = ExportMonthlyRollup if use_rollup else ExportTable
+
+        columns = []
+        for dimension in group_by:
+            if dimension == 'year':
+                columns.append(source['year'].label('year'))
+            elif dimension == 'month':
+                columns.append(source['month'].label('month'))
+            elif dimension == 'destination':
+                columns += [Country.code.label('destination'), Country.name.label('country_name')]
+            elif dimension == 'hscode':
+                columns += [HsCode.code.label('hscode'), HsCode.description.label('hscode_description')]
+            elif dimension in HS_LEVELS:
+                columns.append(getattr(HsCode, dimension).label(dimension))
+            elif dimension == 'product':
+                columns += [Product.id.label('product_id'), Product.name.label('product_name')]
+
+        aggregates = []
+        for metric in metrics:
+            if metric == 'count':
+                aggregates.append(source['count'].label('count'))
+                continue
+            function, _, measure = metric.partition(':')
+            if function not in ('sum', 'avg') or measure not in AGGREGATE_MEASURES:
+                abort(400)
+            aggregates.append(source[function][measure].label(f'{measure}_{function}'))
+
+        stmt = select(*columns, *aggregates).select_from(fact)
+        if 'destination' in group_by:
+            stmt = stmt.join(Country, source['destination_id'] == Country.id)
+        if {'hscode', *HS_LEVELS} & set(group_by):
+            stmt = stmt.join(HsCode, source['hscode_id'] == HsCode.id)
+        if 'product' in group_by:
+            stmt = stmt.join(Product, source['product_id'] == Product.id)
+
+        # Filters stay on the source's own columns so they can use its indexes
+        start = parse_month_arg('start')
+        end = parse_month_arg('end')
+        if start:
+            stmt = stmt.where(source['start'](start))
+        if end:
+            stmt = stmt.where(source['end'](end))
+
+        destinations = parse_csv_arg('destination')
+        if destinations:
+            stmt = stmt.where(source['destination_id'].in_(select(Country.id).where(Country.code.in_(destinations))))
+        hscodes = parse_csv_arg('hscode')
+        if hscodes:
+            stmt = stmt.where(source['hscode_id'].in_(select(HsCode.id).where(HsCode.code.in_(hscodes))))
+        if 'hs_prefix' in request.args:
+            stmt = stmt.where(source['hscode_id'].in_(HsCode.ids_with_prefix(hs_prefixes(request.args['hs_prefix']))))
+
+        if columns:
+            stmt = stmt.group_by(*columns).order_by(*columns)
+
+        rows = db.session.execute(stmt).mappings().all()
+        return jsonify([dict(row) for row in rows])
+
+
+TIMESERIES_DIMENSIONS = {
+    'destination': (Country.code, 'destination_id', Country),
+    'hscode': (HsCode.code, 'hscode_id', HsCode),
+    'chapter': (HsCode.chapter, 'hscode_id', HsCode),
+    'heading': (HsCode.heading, 'hscode_id', HsCode),
+    'subheading': (HsCode.subheading, 'hscode_id', HsCode),
+    'product': (Product.id, 'product_id', Product),
+}
+
+
+def months_before(month_start, months):
+    index = month_start.year * 12 + month_start.month - 1 - months
+    return month_start.replace(year=index // 12, month=index % 12 + 1)
+
+
+class ExportTimeseriesResource(Resource):
+    conditional_tables = EXPORT_TABLES
+
+    def get(self):
+        group_by = parse_csv_arg('group_by')
+        measure = request.args.get('measure', 'fob_value')
+        granularity = request.args.get('granularity', 'month')
+        start = parse_month_arg('start')
+        end = parse_month_arg('end')
+        destinations = sorted(parse_csv_arg('destination'))
+        hscodes = sorted(parse_csv_arg('hscode'))
+        prefixes = sorted(hs_prefixes(request.args['hs_prefix'])) if 'hs_prefix' in request.args else []
+        if any(dimension not in TIMESERIES_DIMENSIONS for dimension in group_by) or len(set(group_by)) != len(group_by) \
+                or measure not in AGGREGATE_MEASURES or granularity not in GRANULARITIES:
+            abort(400)
+
+        def load():
+            use_rollup = current_app.config.get('AGGREGATE_FROM_ROLLUPS', True)
+            source = export_rollup_source() if use_rollup else export_fact_source()
+            stmt = select(source['year'], source['month'],
+                          *[TIMESERIES_DIMENSIONS[dimension][0] for dimension in group_by],
+                          source['sum'][measure]) \
+                .select_from(ExportMonthlyRollup if use_rollup else ExportTable)
+            # hscode and the HS levels share one join
+            joins = {TIMESERIES_DIMENSIONS[dimension][2]: TIMESERIES_DIMENSIONS[dimension][1] for dimension in group_by}
+            for model, id_column in joins.items():
+                stmt = stmt.join(model, source[id_column] == model.id)
+            if start:
+                stmt = stmt.where(source['start'](months_before(start, LOOKBACK_MONTHS)))
+            if end:
+                stmt = stmt.where(source['end'](end))
+            if destinations:
+                stmt = stmt.where(source['destination_id'].in_(select(Country.id).where(Country.code.in_(destinations))))
+            if hscodes:
+                stmt = stmt.where(source['hscode_id'].in_(select(HsCode.id).where(HsCode.code.in_(hscodes))))
+            if prefixes:
+                stmt = stmt.where(source['hscode_id'].in_(HsCode.ids_with_prefix(prefixes)))
+            columns = [source['year'], source['month'], *[TIMESERIES_DIMENSIONS[dimension][0] for dimension in group_by]]
+            rows = db.session.execute(stmt.group_by(*columns)).all()
+
+            result = dense_series(rows, group_by, granularity, start, end)
+            return {'measure': measure, 'granularity': granularity, 'group_by': group_by, **result}
+
+        # Memoized per request shape; rollup refreshes bump the 'exporttables' version
+        key = '|'.join([','.join(group_by), measure, granularity, f'{start:%Y-%m}' if start else '', f'{end:%Y-%m}' if end else '',
+                        ','.join(destinations), ','.join(hscodes), ','.join(prefixes)])
+        return reference_cache.response('exporttables', load, key=f'timeseries:{key}')
+
+
+class SnapshotsResource(Resource):
+    def get(self):
+        manifest = load_manifest()
+        return jsonify({table: [{
+            'partition': partition,
+            'format': entry['format'],
+            'rows': entry['rows'],
+            'bytes': entry['bytes'],
+            'built_at': entry['built_at'],
+            'url': url_for('snapshotfileresource', table=table, year=int(partition[:4]), month=int(partition[5:]))
+        } for partition, entry in sorted(partitions.items())] for table, partitions in manifest.items()})
+
+
+class SnapshotFileResource(Resource):
+    def get(self, table, year, month):
+        if table not in SNAPSHOT_TABLES:
+            abort(404)
+        entry = load_manifest().get(table, {}).get(f'{year}-{month:02d}')
+        if entry is None:
+            abort(404)
 
+        extension, mimetype = SNAPSHOT_FORMATS[entry['format']]
+        # conditional=True answers Range, If-None-Match and If-Modified-Since from the file itself
+        return send_file(
+            partition_path(table, year, month, entry['format']),
+            mimetype=mimetype,
+            conditional=True,
+            etag=True,
+            download_name=f'{table}-{year}-{month:02d}{extension}',
+            max_age=current_app.config.get('SNAPSHOT_MAX_AGE', 3600)
+        )
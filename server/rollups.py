@@ -0,0 +1,72 @@
+from datetime import datetime
+from sqlalchemy import and_, delete, extract, func, insert, or_, select, tuple_
+from models import db, ExportTable, ImportTable, ExportMonthlyRollup, ImportMonthlyRollup
+from cache import reference_cache
+
+
+def next_month(month_start):
+    if month_start.month == 12:
+        return month_start.replace(year=month_start.year + 1, month=1)
+    return month_start.replace(month=month_start.month + 1)
+
+
+def _date_ranges(date_column, months):
+    # One half-open range per month keeps the filter on the fact table's date indexes
+    ranges = []
+    for year, month in sorted(set(months)):
+        start = datetime(int(year), int(month), 1)
+        ranges.append(and_(date_column >= start, date_column < next_month(start)))
+    return or_(*ranges)
+
+
+def _refresh(rollup, fact, date_column, dimensions, measures, months):
+    year = extract('year', date_column)
+    month = extract('month', date_column)
+    fact_dimensions = [getattr(fact, name) for name in dimensions]
+
+    query = select(year, month, *fact_dimensions, *measures.values(), func.count()) \
+        .where(date_column.isnot(None)) \
+        .group_by(year, month, *fact_dimensions)
+    clear = delete(rollup)
+    if months is not None:
+        months = list(months)
+        if not months:
+            return
+        query = query.where(_date_ranges(date_column, months))
+        clear = clear.where(tuple_(rollup.year, rollup.month).in_([(int(y), int(m)) for y, m in months]))
+
+    # Recompute whole months: correct for inserts, updates and deletes alike
+    db.session.execute(clear)
+    db.session.execute(insert(rollup).from_select(['year', 'month', *dimensions, *measures, 'row_count'], query))
+    db.session.commit()
+
+
+def refresh_export_rollup(months=None):
+    """Rebuild export_monthly_rollup for the given (year, month) pairs, or for everything."""
+    _refresh(
+        ExportMonthlyRollup, ExportTable, ExportTable.export_date,
+        ['destination_id', 'hscode_id', 'product_id'],
+        {
+            'fob_sum': func.sum(ExportTable.fob_value),
+            'qty_sum': func.sum(ExportTable.quantity),
+            'fob_count': func.count(ExportTable.fob_value),
+            'qty_count': func.count(ExportTable.quantity),
+        },
+        months
+    )
+    # Every export write path ends here, so this is where responses derived from exports go stale
+    reference_cache.invalidate('exporttables')
+
+
+def refresh_import_rollup(months=None):
+    """Rebuild import_monthly_rollup for the given (year, month) pairs, or for everything."""
+    _refresh(
+        ImportMonthlyRollup, ImportTable, ImportTable.reg_date,
+        ['origin_id', 'destination_id', 'hscode_id', 'product_id'],
+        {
+            'qty_sum': func.sum(ImportTable.quantity),
+            'qty_count': func.count(ImportTable.quantity),
+        },
+        months
+    )
+    reference_cache.invalidate('importtables')
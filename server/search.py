@@ -0,0 +1,168 @@
+import math
+import re
+import threading
+import time
+from bisect import bisect_left
+from collections import defaultdict
+from sqlalchemy import select
+from models import db, HsCode, Product
+from cache import reference_cache
+from hscodes import normalize_hs_code
+
+TOKEN_RE = re.compile(r'[a-z0-9]+')
+SEARCH_LIMIT = 20
+SEARCH_MAX_LIMIT = 100
+
+# Per query token: whole word > word prefix > one edit away
+MATCH_WEIGHTS = {'exact': 3.0, 'prefix': 2.0, 'fuzzy': 1.0}
+CODE_WEIGHT = 4.0
+
+
+def tokenize(text):
+    return TOKEN_RE.findall((text or '').lower())
+
+
+def _deletes(token):
+    return {token[:i] + token[i + 1:] for i in range(len(token))}
+
+
+class SearchIndex:
+    """Inverted index over product names, HS code descriptions and HS code digits.
+
+    Documents are ('product' | 'hscode', id) pairs. Word lookups go through a
+    sorted vocabulary (prefixes) and a single-deletion map (typos within one
+    edit), so a query never scans the documents themselves.
+    """
+
+    def __init__(self, hscodes, products):
+        self.documents = []
+        self.postings = defaultdict(set)
+        self.codes = []
+
+        for hscode_id, code, description in hscodes:
+            doc = len(self.documents)
+            self.documents.append({'type': 'hscode', 'id': hscode_id, 'code': code, 'description': description})
+            self.codes.append((normalize_hs_code(code), doc))
+            for token in tokenize(description):
+                self.postings[token].add(doc)
+
+        code_for_hscode = {hscode_id: code for hscode_id, code, _ in hscodes}
+        self.products_for_code = defaultdict(list)
+        for product_id, name, hs_code_id in products:
+            doc = len(self.documents)
+            code = code_for_hscode.get(hs_code_id)
+            self.documents.append({'type': 'product', 'id': product_id, 'name': name, 'hs_code_id': hs_code_id, 'code': code})
+            if code:
+                self.products_for_code[normalize_hs_code(code)].append(doc)
+            for token in tokenize(name):
+                self.postings[token].add(doc)
+
+        self.codes.sort()
+        self.vocabulary = sorted(self.postings)
+        self.deletions = defaultdict(set)
+        for token in self.vocabulary:
+            if len(token) > 3:
+                for variant in _deletes(token):
+                    self.deletions[variant].add(token)
+        self.idf = {token: math.log(1 + len(self.documents) / len(docs)) for token, docs in self.postings.items()}
+        self.lengths = [len(tokenize(doc.get('name') or doc.get('description'))) or 1 for doc in self.documents]
+
+    def _expand(self, token):
+        """Vocabulary words matching a query token, with the kind of match."""
+        matches = {}
+        start = bisect_left(self.vocabulary, token)
+        for word in self.vocabulary[start:]:
+            if not word.startswith(token):
+                break
+            matches[word] = 'exact' if word == token else 'prefix'
+        # Typo tolerance only for words long enough that one edit is still specific
+        if len(token) > 3:
+            for variant in _deletes(token) | {token}:
+                for word in self.deletions.get(variant, ()):
+                    matches.setdefault(word, 'fuzzy')
+            for word in _deletes(token):
+                if word in self.postings:
+                    matches.setdefault(word, 'fuzzy')
+        return matches
+
+    def _match_code(self, digits):
+        scores = {}
+        start = bisect_left(self.codes, (digits,))
+        for code, doc in self.codes[start:]:
+            if not code.startswith(digits):
+                break
+            # Closer to the full code ranks higher: "4804" puts heading 4804 before 4804.11.00
+            score = CODE_WEIGHT * len(digits) / len(code)
+            scores[doc] = score
+            for product_doc in self.products_for_code.get(code, ()):
+                scores[product_doc] = max(scores.get(product_doc, 0), score * 0.9)
+        return scores
+
+    def search(self, query, limit=SEARCH_LIMIT, types=None):
+        tokens = tokenize(query)
+        if not tokens:
+            return []
+
+        if all(token.isdigit() for token in tokens):
+            scores = self._match_code(''.join(tokens))
+        else:
+            # Every query word has to match something in the document
+            scores = None
+            for token in tokens:
+                token_scores = defaultdict(float)
+                for word, kind in self._expand(token).items():
+                    weight = MATCH_WEIGHTS[kind] * self.idf[word]
+                    for doc in self.postings[word]:
+                        token_scores[doc] = max(token_scores[doc], weight)
+                if scores is None:
+                    scores = dict(token_scores)
+                else:
+                    scores = {doc: score + token_scores[doc] for doc, score in scores.items() if doc in token_scores}
+                if not scores:
+                    return []
+            # Shorter names and descriptions win ties: "wire rods" over a paragraph mentioning them
+            scores = {doc: score / math.sqrt(self.lengths[doc]) for doc, score in scores.items()}
+
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+        results = []
+        for doc, score in ranked:
+            document = self.documents[doc]
+            if types and document['type'] not in types:
+                continue
+            results.append({**document, 'score': round(score, 4)})
+            if len(results) == limit:
+                break
+        return results
+
+
+def build_search_index():
+    hscodes = db.session.execute(select(HsCode.id, HsCode.code, HsCode.description)).all()
+    products = db.session.execute(select(Product.id, Product.name, Product.hs_code_id)).all()
+    return SearchIndex(hscodes, products)
+
+
+_index = None
+_index_versions = None
+_index_built = 0
+_index_lock = threading.Lock()
+
+
+def search_index():
+    """The per-process index, rebuilt when the products or hscodes cache version moves.
+
+    It is also rebuilt once it is older than REFERENCE_CACHE_TTL, which bounds
+    staleness when a write was not followed by an invalidation this process sees.
+    """
+    global _index, _index_versions, _index_built
+    versions = (reference_cache.version('products'), reference_cache.version('hscodes'))
+
+    def stale():
+        return _index is None or versions != _index_versions or reference_cache.outlived(_index_built)
+
+    if stale():
+        with _index_lock:
+            if stale():
+                _index = build_search_index()
+                _index_versions = versions
+                _index_built = time.monotonic()
+    return _index
@@ -0,0 +1,195 @@
+import hashlib
+import json
+import os
+from datetime import datetime
+from flask import current_app
+from sqlalchemy import select
+from sqlalchemy.orm import aliased
+from models import db, Country, HsCode, Product, ExportTable, ImportTable
+from cache import reference_cache
+from rollups import next_month
+
+SNAPSHOT_FORMATS = {
+    'parquet': ('.parquet', 'application/vnd.apache.parquet'),
+    'arrow': ('.arrow', 'application/vnd.apache.arrow.file'),
+}
+
+# Rows fetched at a time while fingerprinting
+FINGERPRINT_BATCH_SIZE = 10000
+
+
+def _export_rows(start, end):
+    return select(
+        ExportTable.id,
+        ExportTable.export_date,
+        ExportTable.fob_value,
+        ExportTable.quantity,
+        ExportTable.unit,
+        Country.code.label('destination'),
+        Country.name.label('country_name'),
+        HsCode.code.label('hscode'),
+        HsCode.description.label('hscode_description'),
+        Product.name.label('product_name'),
+    ).outerjoin(Country, ExportTable.destination_id == Country.id) \
+     .outerjoin(HsCode, ExportTable.hscode_id == HsCode.id) \
+     .outerjoin(Product, ExportTable.product_id == Product.id) \
+     .where(ExportTable.export_date >= start, ExportTable.export_date < end) \
+     .order_by(ExportTable.id)
+
+
+def _import_rows(start, end):
+    origin = aliased(Country)
+    destination = aliased(Country)
+    return select(
+        ImportTable.id,
+        ImportTable.reg_date,
+        ImportTable.entry_number,
+        ImportTable.entry_status,
+        ImportTable.quantity,
+        ImportTable.discharge_port,
+        origin.code.label('origin'),
+        destination.code.label('destination'),
+        HsCode.code.label('hscode'),
+        HsCode.description.label('hscode_description'),
+        Product.name.label('product_name'),
+    ).outerjoin(origin, ImportTable.origin_id == origin.id) \
+     .outerjoin(destination, ImportTable.destination_id == destination.id) \
+     .outerjoin(HsCode, ImportTable.hscode_id == HsCode.id) \
+     .outerjoin(Product, ImportTable.product_id == Product.id) \
+     .where(ImportTable.reg_date >= start, ImportTable.reg_date < end) \
+     .order_by(ImportTable.id)
+
+
+# table -> (model, date column, columns a fingerprint covers, tables whose names are joined in, rows of one month)
+SNAPSHOT_TABLES = {
+    'exports': (ExportTable, ExportTable.export_date,
+                [ExportTable.fob_value, ExportTable.quantity, ExportTable.unit,
+                 ExportTable.destination_id, ExportTable.hscode_id, ExportTable.product_id],
+                ('countries', 'hscodes', 'products'), _export_rows),
+    'imports': (ImportTable, ImportTable.reg_date,
+                [ImportTable.entry_number, ImportTable.entry_status, ImportTable.quantity, ImportTable.discharge_port,
+                 ImportTable.origin_id, ImportTable.destination_id, ImportTable.hscode_id, ImportTable.product_id],
+                ('countries', 'hscodes', 'products'), _import_rows),
+}
+
+
+def snapshot_dir():
+    return current_app.config.get('SNAPSHOT_DIR') or os.path.join(current_app.instance_path, 'snapshots')
+
+
+def snapshot_format():
+    name = current_app.config.get('SNAPSHOT_FORMAT', 'parquet')
+    if name not in SNAPSHOT_FORMATS:
+        raise ValueError(f'Unsupported SNAPSHOT_FORMAT: {name}')
+    return name
+
+
+def partition_path(table, year, month, fmt=None):
+    extension = SNAPSHOT_FORMATS[fmt or snapshot_format()][0]
+    return os.path.join(snapshot_dir(), table, f'year={year}', f'month={month:02d}', 'part' + extension)
+
+
+def load_manifest():
+    try:
+        with open(os.path.join(snapshot_dir(), 'manifest.json')) as manifest_file:
+            return json.load(manifest_file)
+    except FileNotFoundError:
+        return {}
+
+
+def _save_manifest(manifest):
+    path = os.path.join(snapshot_dir(), 'manifest.json')
+    with open(path + '.tmp', 'w') as manifest_file:
+        json.dump(manifest, manifest_file, indent=2, sort_keys=True)
+    os.replace(path + '.tmp', path)
+
+
+def partition_fingerprints(table):
+    """{'YYYY-MM': fingerprint} for every month with rows; a partition is rebuilt when its fingerprint changes.
+
+    The fingerprint hashes each row's id, date and covered columns, so any edit
+    to them moves it. The cache versions of the joined tables are part of it
+    too: renaming a country changes the names written into every partition.
+    """
+    model, date_column, columns, joined_tables, _ = SNAPSHOT_TABLES[table]
+    versions = [reference_cache.version(name) for name in joined_tables]
+    counts, digests = {}, {}
+    rows = db.session.execute(
+        select(model.id, date_column, *columns).where(date_column.isnot(None)).order_by(model.id)
+        .execution_options(yield_per=FINGERPRINT_BATCH_SIZE)
+    )
+    for row in rows:
+        partition = f'{row[1].year}-{row[1].month:02d}'
+        if partition not in digests:
+            counts[partition], digests[partition] = 0, hashlib.sha1()
+        counts[partition] += 1
+        digests[partition].update(repr(tuple(row)).encode())
+    return {partition: [counts[partition], digest.hexdigest(), *versions] for partition, digest in digests.items()}
+
+
+def _write_partition(df, path, fmt):
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise RuntimeError('Snapshots need pyarrow: pip install pyarrow')
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    tmp_path = path + '.tmp'
+    if fmt == 'parquet':
+        pq.write_table(table, tmp_path, compression='zstd')
+    else:
+        with pa.ipc.new_file(tmp_path, table.schema, options=pa.ipc.IpcWriteOptions(compression='zstd')) as writer:
+            writer.write_table(table)
+    os.replace(tmp_path, path)
+
+
+def build_snapshots(tables=None, full=False):
+    """Write changed year/month partitions of the fact tables; returns {table: [rebuilt partitions]}."""
+    import pandas as pd
+
+    fmt = snapshot_format()
+    manifest = load_manifest()
+    rebuilt = {}
+
+    for table in tables or SNAPSHOT_TABLES:
+        rows_for_month = SNAPSHOT_TABLES[table][4]
+        current = partition_fingerprints(table)
+        previous = manifest.get(table, {})
+        rebuilt[table] = []
+
+        for partition, fingerprint in sorted(current.items()):
+            entry = previous.get(partition)
+            year, month = (int(part) for part in partition.split('-'))
+            path = partition_path(table, year, month, fmt)
+            if not full and entry and entry['fingerprint'] == fingerprint and entry['format'] == fmt and os.path.exists(path):
+                continue
+
+            start = datetime(year, month, 1)
+            df = pd.read_sql(rows_for_month(start, next_month(start)), db.session.connection())
+            _write_partition(df, path, fmt)
+            if entry and entry['format'] != fmt and os.path.exists(partition_path(table, year, month, entry['format'])):
+                os.remove(partition_path(table, year, month, entry['format']))
+            previous[partition] = {
+                'fingerprint': fingerprint,
+                'format': fmt,
+                'rows': len(df),
+                'bytes': os.path.getsize(path),
+                'built_at': datetime.utcnow().isoformat(),
+            }
+            rebuilt[table].append(partition)
+
+        # Months that no longer have rows
+        for partition in set(previous) - set(current):
+            year, month = (int(part) for part in partition.split('-'))
+            stale = partition_path(table, year, month, previous[partition]['format'])
+            if os.path.exists(stale):
+                os.remove(stale)
+            del previous[partition]
+
+        manifest[table] = previous
+        os.makedirs(snapshot_dir(), exist_ok=True)
+        _save_manifest(manifest)
+
+    return rebuilt
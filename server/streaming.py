@@ -0,0 +1,63 @@
+import csv
+import io
+from datetime import date, datetime
+from flask import Response, request, stream_with_context
+from models import db
+from encoding import dumps
+
+NDJSON_MIMETYPE = 'application/x-ndjson'
+CSV_MIMETYPE = 'text/csv'
+
+# Rows fetched from the server-side cursor per round trip (and per response chunk)
+STREAM_BATCH_SIZE = 1000
+
+
+def requested_stream_format():
+    # Only stream when the client explicitly prefers NDJSON or CSV; */* keeps the JSON list
+    best = request.accept_mimetypes.best_match(['application/json', NDJSON_MIMETYPE, CSV_MIMETYPE])
+    if best in (NDJSON_MIMETYPE, CSV_MIMETYPE):
+        return best
+    return None
+
+
+def _ndjson_chunks(partitions, to_dict):
+    for rows in partitions:
+        yield b''.join(dumps(to_dict(row)) + b'\n' for row in rows)
+
+
+def encode_csv_value(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+def _csv_chunks(partitions, to_dict, fieldnames):
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=fieldnames)
+    writer.writeheader()
+    for rows in partitions:
+        for row in rows:
+            writer.writerow({key: encode_csv_value(value) for key, value in to_dict(row).items()})
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def stream_response(stmt, to_dict, fieldnames, mimetype, scalars=True):
+    """Stream the rows of a select() as NDJSON or CSV, one chunk per cursor batch.
+
+    ORM entity selects are streamed as objects; pass scalars=False for column selects.
+    """
+    def generate():
+        result = db.session.execute(stmt.execution_options(yield_per=STREAM_BATCH_SIZE))
+        if scalars:
+            result = result.scalars()
+        partitions = result.partitions()
+        if mimetype == CSV_MIMETYPE:
+            yield from _csv_chunks(partitions, to_dict, fieldnames)
+        else:
+            yield from _ndjson_chunks(partitions, to_dict)
+
+    return Response(stream_with_context(generate()), mimetype=mimetype)
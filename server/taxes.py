@@ -0,0 +1,114 @@
+import numpy as np
+from sqlalchemy import select
+from models import db, HsCode, ImportTable, TaxTable
+from hscodes import normalize_hs_code
+
+# TaxTable stores whole percentages
+RATE_COLUMNS = ['import_duty', 'excise_duty', 'export_duty', 'import_declaration_fee', 'railway_development_levy']
+
+
+class RateTable:
+    """TaxTable rows as a (rows x rates) array, with hscode_id -> row lookups.
+
+    The row with no hscode_id, if there is one, is the default for HS codes
+    without their own rates.
+    """
+
+    def __init__(self, rows):
+        self.rates = np.array([[getattr(row, column) or 0 for column in RATE_COLUMNS] for row in rows], dtype=float) / 100
+        self.row_for_hscode = {row.hscode_id: index for index, row in enumerate(rows) if row.hscode_id is not None}
+        self.default_row = next((index for index, row in enumerate(rows) if row.hscode_id is None), -1)
+
+    def rows_for(self, hscode_ids):
+        return np.array([self.row_for_hscode.get(hscode_id, self.default_row) for hscode_id in hscode_ids], dtype=int)
+
+
+def load_rate_table():
+    return RateTable(TaxTable.query.order_by(TaxTable.id).all())
+
+
+def compute_duties(rate_table, rows, customs_values, fob_values):
+    """Vectorized duty breakdown; rows index rate_table, values are float arrays (NaN = not given)."""
+    duty_rate, excise_rate, export_rate, idf_rate, rdl_rate = rate_table.rates[rows].T
+
+    import_duty = customs_values * duty_rate
+    # Excise is charged on the duty-inclusive value
+    excise_duty = (customs_values + import_duty) * excise_rate
+    import_declaration_fee = customs_values * idf_rate
+    railway_development_levy = customs_values * rdl_rate
+    total_import_taxes = import_duty + excise_duty + import_declaration_fee + railway_development_levy
+
+    return {
+        'import_duty': import_duty,
+        'excise_duty': excise_duty,
+        'import_declaration_fee': import_declaration_fee,
+        'railway_development_levy': railway_development_levy,
+        'total_import_taxes': total_import_taxes,
+        'landed_cost': customs_values + total_import_taxes,
+        'export_duty': fob_values * export_rate,
+    }
+
+
+def _number(value):
+    if value is None:
+        return np.nan
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        raise ValueError
+    return float(value)
+
+
+def _is_id(value):
+    # bool is an int subclass: true must not quote import 1
+    return type(value) is int
+
+
+def quote_items(items):
+    """Quote a list of {'hscode' | 'import_id', 'customs_value', 'fob_value'} dicts in one pass."""
+    hscodes = {normalize_hs_code(code): hscode_id for hscode_id, code in db.session.execute(select(HsCode.id, HsCode.code))}
+    import_ids = [item['import_id'] for item in items if _is_id(item.get('import_id'))]
+    import_hscodes = dict(db.session.execute(
+        select(ImportTable.id, ImportTable.hscode_id).where(ImportTable.id.in_(import_ids))
+    ).all()) if import_ids else {}
+    rate_table = load_rate_table()
+
+    results = [None] * len(items)
+    valid, hscode_ids, customs_values, fob_values = [], [], [], []
+    for index, item in enumerate(items):
+        if 'import_id' in item:
+            if not _is_id(item['import_id']):
+                results[index] = {'index': index, 'error': 'import_id must be an integer'}
+                continue
+            hscode_id = import_hscodes.get(item['import_id'])
+            if hscode_id is None:
+                results[index] = {'index': index, 'error': f"Unknown import_id {item['import_id']}"}
+                continue
+        else:
+            hscode_id = hscodes.get(normalize_hs_code(item.get('hscode', '')))
+            if hscode_id is None:
+                results[index] = {'index': index, 'error': f"Unknown HS code {item.get('hscode')}"}
+                continue
+        if hscode_id not in rate_table.row_for_hscode and rate_table.default_row < 0:
+            results[index] = {'index': index, 'error': 'No tax rates for this HS code'}
+            continue
+        try:
+            customs_value, fob_value = _number(item.get('customs_value')), _number(item.get('fob_value'))
+        except ValueError:
+            results[index] = {'index': index, 'error': 'customs_value and fob_value must be numbers'}
+            continue
+        if np.isnan(customs_value) and np.isnan(fob_value):
+            results[index] = {'index': index, 'error': 'customs_value or fob_value is required'}
+            continue
+        valid.append(index)
+        hscode_ids.append(hscode_id)
+        customs_values.append(customs_value)
+        fob_values.append(fob_value)
+
+    if valid:
+        duties = compute_duties(rate_table, rate_table.rows_for(hscode_ids), np.array(customs_values), np.array(fob_values))
+        # NaN marks the side (import or export) that was not asked for
+        columns = {name: [None if np.isnan(value) else round(float(value), 2) for value in values]
+                   for name, values in duties.items()}
+        for position, index in enumerate(valid):
+            results[index] = {'index': index, 'hscode_id': hscode_ids[position],
+                              **{name: values[position] for name, values in columns.items()}}
+    return results
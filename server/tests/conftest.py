@@ -0,0 +1,62 @@
+import pandas as pd
+import pytest
+from app import create_app
+from config import Config, engine_options
+from models import db, Country, HsCode
+
+EXPORT_ROWS = [
+    # SHORT_DESC, HS CODE, Year, Month, DESTINATION, QUANTITY, UNIT, FOB_VALUE
+    ('Kraft paper', '4804.11.00', 2023, 1, 'UG', 10.0, 'KG', 100.5),
+    ('Kraft paper', '4804.11.00', 2023, 1, 'TZ', 5.0, 'KG', 40.25),
+    ('Kraft paper', '4804.11.00', 2023, 2, 'UG', 7.0, 'KG', 70.0),
+    ('Black tea', '0902.30.00', 2023, 1, 'UG', 3.0, 'KG', 12.0),
+    ('Black tea', '0902.30.00', 2023, 3, 'TZ', None, 'KG', 9.5),
+    ('Green tea', '0902.10.00', 2024, 1, 'TZ', 2.0, 'KG', 8.0),
+]
+
+
+def export_frame(rows=EXPORT_ROWS):
+    return pd.DataFrame(rows, columns=['SHORT_DESC', 'HS CODE', 'Year', 'Month', 'DESTINATION',
+                                       'QUANTITY', 'UNIT', 'FOB_VALUE'])
+
+
+@pytest.fixture
+def app(tmp_path):
+    url = f'sqlite:///{tmp_path / "app.db"}'
+
+    class TestConfig(Config):
+        TESTING = True
+        SECRET_KEY = 'test'
+        SQLALCHEMY_DATABASE_URI = url
+        SQLALCHEMY_ENGINE_OPTIONS = engine_options(url)
+        # Shared (file) backend, so conditional GETs are on; one per test
+        REFERENCE_CACHE_URL = f'sqlite:///{tmp_path / "reference-cache.db"}'
+        READ_REPLICA_URL = None
+        READ_SNAPSHOT = False
+
+    app = create_app(TestConfig)
+    with app.app_context():
+        db.create_all()
+        db.session.add_all([
+            Country(name='Uganda', code='UG'),
+            Country(name='Tanzania', code='TZ'),
+            HsCode(code='4804.11.00', description='Kraftliner, unbleached'),
+            HsCode(code='0902.30.00', description='Black tea, in packings not exceeding 3 kg'),
+            HsCode(code='0902.10.00', description='Green tea, in packings not exceeding 3 kg'),
+        ])
+        db.session.commit()
+        yield app
+        db.session.remove()
+        db.engine.dispose()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def export_file(tmp_path):
+    path = tmp_path / 'exports.csv'
+    export_frame().to_csv(path, index=False)
+    return str(path)
@@ -0,0 +1,98 @@
+from sqlalchemy import func, select
+from importer import import_exports_file, load_exports, load_import_declarations
+from models import db, ExportTable, ImportTable, LoadManifest, Product
+from conftest import EXPORT_ROWS, export_frame
+
+
+def export_count():
+    return db.session.execute(select(func.count()).select_from(ExportTable)).scalar()
+
+
+def test_reimporting_a_file_is_skipped(app, export_file):
+    report = import_exports_file(export_file)
+    assert report['exports_written'] == len(EXPORT_ROWS)
+    assert report['products_inserted'] == 3
+
+    assert import_exports_file(export_file) is None
+    assert export_count() == len(EXPORT_ROWS)
+    assert db.session.execute(select(func.count()).select_from(LoadManifest)).scalar() == 1
+
+
+def test_forced_reimport_writes_nothing(app, export_file):
+    import_exports_file(export_file)
+    report = import_exports_file(export_file, force=True)
+    assert report['exports_written'] == 0
+    assert report['products_inserted'] == 0
+    assert export_count() == len(EXPORT_ROWS)
+    assert db.session.execute(select(func.count()).select_from(Product)).scalar() == 3
+
+
+def test_upsert_updates_changed_measures(app):
+    load_exports(export_frame(), upsert=True)
+
+    revised = export_frame()
+    revised.loc[0, 'FOB_VALUE'] = 999.0
+    revised.loc[4, 'QUANTITY'] = 4.0
+    report = load_exports(revised, upsert=True)
+
+    assert report['exports_written'] == 2
+    assert export_count() == len(EXPORT_ROWS)
+    assert db.session.execute(select(func.sum(ExportTable.fob_value))).scalar() == \
+        sum(row[7] for row in EXPORT_ROWS) - 100.5 + 999.0
+    assert db.session.execute(select(func.sum(ExportTable.quantity))).scalar() == 27.0 + 4.0
+
+
+def test_duplicate_natural_keys_are_rejected(app):
+    frame = export_frame(EXPORT_ROWS + [EXPORT_ROWS[0]])
+    report = load_exports(frame)
+    assert report['exports_written'] == len(EXPORT_ROWS)
+    assert report['rejected'] == {'duplicate natural key': 1}
+
+    # A plain load of rows that are already stored leaves them alone
+    report = load_exports(export_frame())
+    assert report['exports_written'] == 0
+    assert report['rejected'] == {'already stored': len(EXPORT_ROWS)}
+    assert export_count() == len(EXPORT_ROWS)
+
+
+def test_unknown_codes_are_rejected(app):
+    frame = export_frame([
+        ('Kraft paper', '9999.99.99', 2023, 1, 'UG', 1.0, 'KG', 1.0),
+        ('Kraft paper', '4804.11.00', 2023, 1, 'ZZ', 1.0, 'KG', 1.0),
+        ('Kraft paper', '4804.11.00', 2023, 13, 'UG', 1.0, 'KG', 1.0),
+    ])
+    report = load_exports(frame)
+    assert report['exports_written'] == 0
+    assert report['rejected'] == {'unknown HS code': 1, 'unknown destination': 1, 'invalid year/month': 1}
+
+
+def test_import_declarations_report_errors_per_row(app):
+    load_exports(export_frame())
+    product_id = db.session.execute(select(Product.id)).scalars().first()
+    good = {'reg_date': '2023-05-02', 'entry_number': 1, 'entry_status': 'cleared', 'quantity': 5,
+            'discharge_port': 'Mombasa', 'origin': 'ug', 'destination': 'TZ', 'hscode': '4804.11.00',
+            'product_id': product_id}
+    records = [
+        good,
+        dict(good, entry_number=2 ** 63),
+        dict(good, quantity=True),
+        dict(good, quantity=-1),
+        dict(good, entry_status=5),
+        dict(good, origin='ZZ', hscode='0000'),
+        dict(good, reg_date='not a date'),
+        'not an object',
+    ]
+    report = load_import_declarations(records)
+
+    assert report['imports_written'] == 1
+    assert report['rows_rejected'] == 7
+    assert report['errors'] == [
+        {'index': 1, 'errors': {'entry_number': 'must be an integer'}},
+        {'index': 2, 'errors': {'quantity': 'must be a non-negative integer'}},
+        {'index': 3, 'errors': {'quantity': 'must be a non-negative integer'}},
+        {'index': 4, 'errors': {'entry_status': 'must be a string'}},
+        {'index': 5, 'errors': {'origin': 'unknown country code', 'hscode': 'unknown HS code'}},
+        {'index': 6, 'errors': {'reg_date': 'required, as an ISO 8601 date'}},
+        {'index': 7, 'errors': {'declaration': 'must be a JSON object'}},
+    ]
+    assert db.session.execute(select(func.count()).select_from(ImportTable)).scalar() == 1
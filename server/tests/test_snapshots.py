@@ -0,0 +1,48 @@
+from datetime import datetime
+import pytest
+from sqlalchemy import select, update
+from importer import load_exports, load_import_declarations
+from models import db, Country, ExportTable, ImportTable
+from snapshots import build_snapshots
+from conftest import export_frame
+
+
+@pytest.fixture
+def snapshot_app(app, tmp_path):
+    app.config['SNAPSHOT_DIR'] = str(tmp_path / 'snapshots')
+    load_exports(export_frame())
+    load_import_declarations([
+        {'reg_date': '2023-05-02', 'entry_status': 'CLEARED', 'origin': 'UG', 'hscode': '0902.10.00'},
+        {'reg_date': '2023-06-10', 'entry_status': 'CLEARED', 'origin': 'TZ', 'hscode': '0902.10.00'},
+    ])
+    build_snapshots()
+    return app
+
+
+def test_unchanged_partitions_are_kept(snapshot_app):
+    assert build_snapshots() == {'exports': [], 'imports': []}
+
+
+def test_same_length_string_edit_rebuilds_the_partition(snapshot_app):
+    db.session.execute(update(ImportTable).where(ImportTable.reg_date < datetime(2023, 6, 1)).values(entry_status='PENDING'))
+    first_export = db.session.execute(select(ExportTable.id).order_by(ExportTable.id)).scalar()
+    db.session.execute(update(ExportTable).where(ExportTable.id == first_export).values(unit='MT'))
+    db.session.commit()
+
+    assert build_snapshots() == {'exports': ['2023-01'], 'imports': ['2023-05']}
+
+
+def test_date_moved_within_the_month_rebuilds_the_partition(snapshot_app):
+    db.session.execute(update(ImportTable).where(ImportTable.reg_date < datetime(2023, 6, 1)).values(reg_date=datetime(2023, 5, 20)))
+    db.session.commit()
+
+    assert build_snapshots(['imports']) == {'imports': ['2023-05']}
+
+
+def test_country_rename_rebuilds_every_partition(snapshot_app, client):
+    country_id = db.session.execute(select(Country.id).filter_by(code='UG')).scalar()
+    assert client.put(f'/countries/{country_id}', json={'name': 'Republic of Uganda'}).status_code == 200
+
+    rebuilt = build_snapshots()
+    assert rebuilt['exports'] == ['2023-01', '2023-02', '2023-03', '2024-01']
+    assert rebuilt['imports'] == ['2023-05', '2023-06']
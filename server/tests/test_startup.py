@@ -0,0 +1,13 @@
+from benchmarks.startup import FORBID, run_once
+
+
+def test_heavy_modules_are_not_imported_before_the_first_request(tmp_path, monkeypatch):
+    # A fresh interpreter, as a new worker would be, on its own empty database
+    monkeypatch.setenv('DATABASE_URL', f'sqlite:///{tmp_path / "app.db"}')
+    monkeypatch.setenv('REFERENCE_CACHE_URL', 'memory')
+    monkeypatch.delenv('FLASK_RUN_FROM_CLI', raising=False)
+
+    timings = run_once(['/'], FORBID)
+
+    assert timings['heavy_modules_at_startup'] == []
+    assert timings['first_requests']['/'][1] == 200
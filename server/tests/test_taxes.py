@@ -0,0 +1,15 @@
+from taxes import quote_items
+
+
+def test_import_id_must_be_an_integer(app):
+    results = quote_items([{'import_id': value, 'customs_value': 100} for value in (True, [1], {'id': 1}, '1', 1.0)])
+    assert results == [{'index': index, 'error': 'import_id must be an integer'} for index in range(5)]
+
+
+def test_unknown_import_id_is_reported_per_item(client):
+    response = client.post('/taxes/quote', json={'items': [{'import_id': 12345, 'customs_value': 100}, {'import_id': [1]}]})
+    assert response.status_code == 200
+    assert response.get_json()['items'] == [
+        {'index': 0, 'error': 'Unknown import_id 12345'},
+        {'index': 1, 'error': 'import_id must be an integer'},
+    ]
@@ -0,0 +1,66 @@
+# Months per period, and the pandas frequency for it
+GRANULARITIES = {'month': (1, 'M'), 'quarter': (3, 'Q'), 'year': (12, 'Y')}
+
+# Trailing means, in months; skipped when shorter than one period
+ROLLING_WINDOWS = {'mean_3m': 3, 'mean_12m': 12}
+
+# History to load before a requested start so YoY and the 12-month mean are complete from its first period
+LOOKBACK_MONTHS = 12
+
+
+def _json_values(frame):
+    import numpy as np
+
+    # NaN (no prior period, division by zero) becomes null
+    frame = frame.round(4).replace([np.inf, -np.inf], np.nan)
+    return frame.astype(object).where(frame.notna(), None)
+
+
+def dense_series(rows, keys, granularity='month', start=None, end=None):
+    """Turn (year, month, *keys, value) rows into gap-filled series with YoY growth and trailing means.
+
+    Every series covers the same periods, from start (or the first month with
+    data) to end (or the last); missing periods count as 0.
+    """
+    # pandas is only loaded once a time series is asked for
+    import pandas as pd
+
+    months_per_period, freq = GRANULARITIES[granularity]
+    frame = pd.DataFrame(rows, columns=['year', 'month', *keys, 'value'])
+    if frame.empty:
+        return {'periods': [], 'series': []}
+
+    frame['period'] = pd.PeriodIndex.from_fields(year=frame['year'].astype(int), month=frame['month'].astype(int), freq='M') \
+        .asfreq(freq)
+    frame['value'] = frame['value'].astype(float)
+    series_keys = keys or ['all']
+    if not keys:
+        frame['all'] = 'all'
+
+    # One column per series, one row per period: every series is filled and shifted in the same operation
+    wide = frame.pivot_table(index='period', columns=series_keys, values='value', aggfunc='sum')
+    first = pd.Period(start, freq=freq) if start else wide.index.min()
+    last = pd.Period(end, freq=freq) if end else wide.index.max()
+    # Earlier rows are only there as history (see LOOKBACK_MONTHS); before the first row nothing is known
+    wide = wide.reindex(pd.period_range(min(first, wide.index.min()), last, freq=freq), fill_value=0).fillna(0)
+
+    periods_per_year = 12 // months_per_period
+    previous_year = wide.shift(periods_per_year)
+    columns = {'values': wide, 'yoy': wide / previous_year.where(previous_year != 0) - 1}
+    for name, months in ROLLING_WINDOWS.items():
+        if months >= months_per_period:
+            window = months // months_per_period
+            columns[name] = wide.rolling(window, min_periods=window).mean()
+
+    visible = wide.index >= first
+    columns = {name: _json_values(values[visible]) for name, values in columns.items()}
+
+    series = []
+    for position, key in enumerate(wide.columns):
+        key = key if isinstance(key, tuple) else (key,)
+        entry = {} if not keys else {name: value.item() if hasattr(value, 'item') else value for name, value in zip(keys, key)}
+        for name, values in columns.items():
+            entry[name] = values.iloc[:, position].tolist()
+        series.append(entry)
+
+    return {'periods': [str(period) for period in wide.index[visible]], 'series': series}